@@ -1,11 +1,47 @@
-from flask import Flask, render_template, request, redirect, url_for, session
+from flask import Flask, abort, g, make_response, render_template, request, redirect, url_for, session
+import asyncio
+import bisect
+import click
+import collections
+import concurrent.futures
+import contextlib
+import csv
 import datetime
+import functools
+import gzip
+import hashlib
+import heapq
+import hmac
+import io
+import itertools
+import json
+import math
 import pytz
 import random
+import re
 import string
 import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from itsdangerous import BadSignature
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_cookie
 from werkzeug.utils import secure_filename
 
+try:
+    import orjson  # optional: mas mabilis na JSON para sa API
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # optional: mas maliit kaysa gzip kapag supported ng browser
+except ImportError:
+    brotli = None
+
 app = Flask(__name__)
 app.secret_key = "secret-key"
 
@@ -24,19 +60,19 @@ USERS = {}           # username -> password
 USER_FULLNAME = {}   # username -> FULL NAME (uppercase)
 
 MOOD_LOGS = {}       # username -> {date: mood_text}
-STUDY_LOGS = {}      # username -> [ {date, minutes, rest_seconds?} ]
+STUDY_LOGS = {}      # username -> [StudyRecord(date, minutes, rest_seconds)]
 HELP_REQUESTS = {}   # simple personal help (/help page)
 
 FRIENDS = {}          # username -> [friend_usernames]
 FRIEND_REQUESTS = {}  # username -> [sender_usernames]
-USER_STATUS = {}      # username -> "studying" / "resting" / "offline"
+USER_STATUS = {}      # username -> "studying" / "resting" (wala = offline, tingnan PRESENCE)
 
-CLASSROOMS = {}       # code -> {"name": ..., "owner": username, "members": set([...])}
+CLASSROOMS = {}       # code -> {"name": ..., "owner": username, "members": set([...]), "school": id}
 USER_CLASSROOMS = {}  # username -> [classroom_code, ...]
 
 CLASS_EMOTIONS = {}   # code -> {username: {"emotion": str, "date": iso, "time": str}}
-CLASS_HELP = {}       # code -> [ {"message": str, "date": iso, "time": str, "seen_by": [usernames]} ]
-CLASS_ANNOUNCEMENTS = {}  # code -> [ {"sender": str, "message": str, "date": iso} ]
+CLASS_HELP = {}       # code -> [HelpMessage(message, date, time, seen_by=[usernames])]
+CLASS_ANNOUNCEMENTS = {}  # code -> [Announcement(sender, message, date)]
 
 PROFILE_PICS = {}     # username -> filename ng profile pic
 
@@ -66,26 +102,41 @@ EMOTION_MESSAGES = {
 # -------------------------
 # HELPER FUNCTIONS
 # -------------------------
+def today_date():
+    """Petsa sa PH time; pareho ng client (offline.js) kahit UTC ang server."""
+    return datetime.datetime.now(PH_TZ).date()
+
+
 def today():
-    return datetime.date.today().isoformat()
+    return today_date().isoformat()
 
 
 def last_7_days():
-    today_d = datetime.date.today()
+    today_d = today_date()
     return [(today_d - datetime.timedelta(days=i)).isoformat() for i in range(6, -1, -1)]
 
 
 def compute_study(username, days):
     totals = {d: 0 for d in days}
+    wanted = {iso_to_day(d): d for d in days}
     for record in STUDY_LOGS.get(username, []):
-        if record.get("date") in totals:
-            totals[record["date"]] += record.get("minutes", 0)
+        d = wanted.get(record.day)
+        if d is not None:
+            totals[d] += record.minutes
     return totals
 
 
+NEGATIVE_MOOD_WORDS = ["sad", "stressed", "tired", "lonely", "anxious", "overwhelmed"]
+# isang regex scan sa halip na lower() + 6 na substring checks per mood
+NEGATIVE_MOOD_RE = re.compile("|".join(map(re.escape, NEGATIVE_MOOD_WORDS)), re.IGNORECASE)
+
+
+def is_negative_mood(mood_text):
+    return bool(mood_text) and NEGATIVE_MOOD_RE.search(mood_text) is not None
+
+
 def generate_advice(avg, moods):
-    negative = ["sad", "stressed", "tired", "lonely", "anxious", "overwhelmed"]
-    mood_bad = sum(1 for m in moods if m and any(x in m.lower() for x in negative))
+    mood_bad = sum(1 for m in moods if is_negative_mood(m))
 
     # 0 minutes average
     if avg == 0:
@@ -141,6 +192,869 @@ def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+# -------------------------
+# COMPACT LOG RECORDS
+# -------------------------
+# Milyon-milyon ang entries sa STUDY_LOGS / CLASS_HELP / CLASS_ANNOUNCEMENTS,
+# kaya __slots__ (walang per-entry dict) at integer day (date ordinal) sa
+# halip na ISO string bawat record. Ang `date` property ay nagbabalik pa rin
+# ng ISO string para hindi magbago ang templates at API.
+@functools.lru_cache(maxsize=4096)
+def iso_to_day(date_iso):
+    return datetime.date.fromisoformat(date_iso).toordinal()
+
+
+@functools.lru_cache(maxsize=4096)
+def day_to_iso(day):
+    return datetime.date.fromordinal(day).isoformat()
+
+
+class StudyRecord:
+    __slots__ = ("day", "minutes", "rest_seconds")
+
+    def __init__(self, date, minutes, rest_seconds=0):
+        self.day = iso_to_day(date)
+        self.minutes = minutes
+        self.rest_seconds = rest_seconds
+
+    @property
+    def date(self):
+        return day_to_iso(self.day)
+
+    def as_dict(self):
+        return {"date": self.date, "minutes": self.minutes, "rest_seconds": self.rest_seconds}
+
+
+class HelpMessage:
+    __slots__ = ("message", "day", "time", "seen_by")
+
+    def __init__(self, message, date, time, seen_by=()):
+        self.message = message
+        self.day = iso_to_day(date)
+        self.time = sys.intern(time)
+        self.seen_by = list(seen_by)  # list: mas maliit kaysa set sa class-sized groups
+
+    @property
+    def date(self):
+        return day_to_iso(self.day)
+
+    def as_dict(self):
+        """Public (anonymous) view: walang seen_by."""
+        return {"message": self.message, "date": self.date, "time": self.time}
+
+
+class Announcement:
+    __slots__ = ("sender", "message", "day")
+
+    def __init__(self, sender, message, date):
+        self.sender = sys.intern(sender)
+        self.message = message
+        self.day = iso_to_day(date)
+
+    @property
+    def date(self):
+        return day_to_iso(self.day)
+
+    def as_dict(self):
+        return {"sender": self.sender, "message": self.message, "date": self.date}
+
+
+# -------------------------
+# STRIPED LOCKS (per user / per classroom)
+# -------------------------
+# Para safe ang read-modify-write (setdefault + append, `in` + remove) kahit
+# maraming threads per worker (gunicorn gthread). Fixed na bilang ng RLock;
+# bawat username / classroom code ay naka-hash sa isang stripe. Laging
+# sorted ang pag-acquire para walang deadlock kapag maraming stripe.
+LOCK_STRIPES = 64
+_STRIPE_LOCKS = [threading.RLock() for _ in range(LOCK_STRIPES)]
+
+
+def _stripe(kind, key):
+    return hash((kind, key)) % LOCK_STRIPES
+
+
+@contextlib.contextmanager
+def locked(users=(), classrooms=()):
+    """Hold the stripes for the given usernames and classroom codes."""
+    stripes = sorted(
+        {_stripe("user", u) for u in users} | {_stripe("class", c) for c in classrooms}
+    )
+    for i in stripes:
+        _STRIPE_LOCKS[i].acquire()
+    try:
+        yield
+    finally:
+        for i in reversed(stripes):
+            _STRIPE_LOCKS[i].release()
+
+
+def class_members(code):
+    """Snapshot ng members list; under the stripe kasi set ito na nababago ng join."""
+    with locked(classrooms=(code,)):
+        data = CLASSROOMS.get(code)
+        return list(data["members"]) if data else []
+
+
+# -------------------------
+# PRESENCE (heartbeat + TTL)
+# -------------------------
+# Wala sa USER_STATUS = offline. Bawat studying/resting ay may deadline;
+# kapag walang heartbeat bago mag-deadline (sarado na yung tab), ibinabalik
+# ng sweeper thread sa offline.
+PRESENCE_TTL = 120          # seconds bago ma-expire ang walang heartbeat
+PRESENCE_STATES = ("studying", "resting")
+
+PRESENCE_DEADLINES = {}     # username -> monotonic deadline
+CLASS_PRESENCE = {}         # code -> {"studying": n, "resting": n}
+_PRESENCE_HEAP = []         # [(deadline, username)], may stale entries (lazy delete)
+_PRESENCE_LOCK = threading.Lock()
+_PRESENCE_WAKE = threading.Event()
+
+
+def _shift_presence_counts(codes, old, new):
+    for code in codes:
+        counts = CLASS_PRESENCE.setdefault(code, {s: 0 for s in PRESENCE_STATES})
+        if old in counts:
+            counts[old] -= 1
+        if new in counts:
+            counts[new] += 1
+
+
+def _apply_presence(user, state):
+    # caller must hold _PRESENCE_LOCK
+    old = USER_STATUS.get(user, "offline")
+    if state in PRESENCE_STATES:
+        USER_STATUS[user] = state
+        deadline = time.monotonic() + PRESENCE_TTL
+        PRESENCE_DEADLINES[user] = deadline
+        if not _PRESENCE_HEAP:
+            _PRESENCE_WAKE.set()
+        heapq.heappush(_PRESENCE_HEAP, (deadline, user))
+    else:
+        USER_STATUS.pop(user, None)
+        PRESENCE_DEADLINES.pop(user, None)
+    if old != state:
+        _shift_presence_counts(USER_CLASSROOMS.get(user, []), old, state)
+
+
+def set_presence(user, state):
+    """Set studying / resting / offline and refresh the TTL."""
+    with _PRESENCE_LOCK:
+        _apply_presence(user, state)
+
+
+def heartbeat(user):
+    """Keep the current studying/resting state alive for another TTL."""
+    with _PRESENCE_LOCK:
+        state = USER_STATUS.get(user)
+        if state:
+            _apply_presence(user, state)
+
+
+# Ang pagbago ng USER_CLASSROOMS[user] at ng CLASS_PRESENCE counts ay iisang
+# _PRESENCE_LOCK section, kasi binabasa ng set_presence ang USER_CLASSROOMS;
+# kung hiwalay, puwedeng ma-count nang dalawang beses ang user sa bagong class.
+def presence_join(user, code):
+    """Add code to USER_CLASSROOMS[user] and count their presence; False kung member na."""
+    with _PRESENCE_LOCK:
+        codes = USER_CLASSROOMS.setdefault(user, [])
+        if code in codes:
+            return False
+        codes.append(code)
+        _shift_presence_counts([code], None, USER_STATUS.get(user))
+        return True
+
+
+def presence_leave(user, code):
+    """Remove code from USER_CLASSROOMS[user] and uncount them; False kung hindi member."""
+    with _PRESENCE_LOCK:
+        codes = USER_CLASSROOMS.get(user, [])
+        if code not in codes:
+            return False
+        codes.remove(code)
+        _shift_presence_counts([code], USER_STATUS.get(user), None)
+        return True
+
+
+def class_presence(code):
+    """O(1): bilang ng studying/resting ngayon sa classroom."""
+    return dict(CLASS_PRESENCE.get(code) or {s: 0 for s in PRESENCE_STATES})
+
+
+def sweep_presence(now=None):
+    """Expire users whose deadline has passed; returns seconds until the next one."""
+    now = time.monotonic() if now is None else now
+    with _PRESENCE_LOCK:
+        while _PRESENCE_HEAP and _PRESENCE_HEAP[0][0] <= now:
+            deadline, user = heapq.heappop(_PRESENCE_HEAP)
+            # stale entry kung nag-heartbeat ulit after nito
+            if PRESENCE_DEADLINES.get(user) == deadline:
+                _apply_presence(user, "offline")
+        next_in = _PRESENCE_HEAP[0][0] - now if _PRESENCE_HEAP else PRESENCE_TTL
+    return max(next_in, 0.5)
+
+
+def _presence_sweeper():
+    while True:
+        wait = sweep_presence()
+        _PRESENCE_WAKE.wait(timeout=wait)
+        _PRESENCE_WAKE.clear()
+
+
+_BACKGROUND_STARTED = False
+_BACKGROUND_LOCK = threading.Lock()
+
+
+def start_background_workers():
+    """Start daemon threads once per process (after gunicorn forks)."""
+    global _BACKGROUND_STARTED
+    with _BACKGROUND_LOCK:
+        if _BACKGROUND_STARTED:
+            return
+        _BACKGROUND_STARTED = True
+        threading.Thread(target=_presence_sweeper, name="presence-sweeper", daemon=True).start()
+        threading.Thread(target=_risk_job_loop, name="at-risk-job", daemon=True).start()
+        threading.Thread(target=_compaction_loop, name="compaction", daemon=True).start()
+
+
+@app.before_request
+def ensure_background_workers():
+    if not _BACKGROUND_STARTED:
+        start_background_workers()
+
+
+# -------------------------
+# STUDY STREAKS + CLASSROOM LEADERBOARD
+# -------------------------
+# Incremental: ina-update tuwing may bagong study record, para hindi na
+# i-scan ang STUDY_LOGS ng bawat member sa bawat page view. Ang ranking ay
+# sorted list na ina-update gamit ang bisect (O(log M) search per update),
+# kaya ang top-N ay slice lang: O(N) per page view.
+LEADERBOARD_SIZE = 5
+
+USER_STREAKS = {}          # username -> {"current": n, "longest": n, "last_date": iso}
+USER_WEEKLY_MINUTES = {}   # username -> {week_key: minutes}
+CLASS_WEEKLY_MINUTES = {}  # code -> {week_key: {username: minutes}}
+CLASS_WEEKLY_TOTALS = {}   # code -> {week_key: minutes}
+CLASS_WEEKLY_RANKS = {}    # code -> {week_key: sorted [(-minutes, username)]}
+
+
+def week_key(date_iso):
+    """ISO week, hal. '2026-W42'."""
+    year, week, _ = datetime.date.fromisoformat(date_iso).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _bump_streak(user, date_iso):
+    streak = USER_STREAKS.setdefault(user, {"current": 0, "longest": 0, "last_date": None})
+    last = streak["last_date"]
+    if last is not None and date_iso <= last:
+        return  # same day o backfilled na luma; walang epekto sa streak
+    if last is not None and (
+        datetime.date.fromisoformat(date_iso) - datetime.date.fromisoformat(last)
+    ).days == 1:
+        streak["current"] += 1
+    else:
+        streak["current"] = 1
+    streak["last_date"] = date_iso
+    streak["longest"] = max(streak["longest"], streak["current"])
+
+
+def _rank_remove(ranks, user, minutes):
+    i = bisect.bisect_left(ranks, (-minutes, user))
+    if i < len(ranks) and ranks[i] == (-minutes, user):
+        del ranks[i]
+
+
+def _add_class_minutes(code, wk, user, minutes):
+    """Weekly member minutes + total + sorted rank ng isang classroom."""
+    members = CLASS_WEEKLY_MINUTES.setdefault(code, {}).setdefault(wk, {})
+    old = members.get(user, 0)
+    members[user] = old + minutes
+    totals = CLASS_WEEKLY_TOTALS.setdefault(code, {})
+    totals[wk] = totals.get(wk, 0) + minutes
+    ranks = CLASS_WEEKLY_RANKS.setdefault(code, {}).setdefault(wk, [])
+    if old:
+        _rank_remove(ranks, user, old)
+    bisect.insort(ranks, (-(old + minutes), user))
+
+
+def track_study(user, date_iso, minutes):
+    """Update streak + weekly totals for one new study record."""
+    _bump_streak(user, date_iso)
+    wk = week_key(date_iso)
+    weekly = USER_WEEKLY_MINUTES.setdefault(user, {})
+    weekly[wk] = weekly.get(wk, 0) + minutes
+    for code in USER_CLASSROOMS.get(user, []):
+        _add_class_minutes(code, wk, user, minutes)
+
+
+def rebuild_streak(user):
+    """
+    Recompute a streak from STUDY_LOGS (after bulk loads o backdated na
+    record). Hindi bababa ang longest: baka na-compact na ang lumang logs.
+    """
+    old = USER_STREAKS.pop(user, None)
+    for day in sorted({r.day for r in STUDY_LOGS.get(user, [])}):
+        _bump_streak(user, day_to_iso(day))
+    if old and user in USER_STREAKS:
+        USER_STREAKS[user]["longest"] = max(USER_STREAKS[user]["longest"], old["longest"])
+
+
+def get_streak(user):
+    """Current streak resets to 0 kapag walang study kahapon at ngayon."""
+    streak = USER_STREAKS.get(user)
+    if not streak:
+        return {"current": 0, "longest": 0}
+    yesterday = (today_date() - datetime.timedelta(days=1)).isoformat()
+    current = streak["current"] if streak["last_date"] >= yesterday else 0
+    return {"current": current, "longest": streak["longest"]}
+
+
+def leaderboard_join(user, code):
+    """Dalhin ang minutes ni user this week sa bagong classroom."""
+    wk = week_key(today())
+    minutes = USER_WEEKLY_MINUTES.get(user, {}).get(wk, 0)
+    if minutes:
+        _add_class_minutes(code, wk, user, minutes)
+
+
+def leaderboard_leave(user, code):
+    weeks = CLASS_WEEKLY_MINUTES.get(code, {})
+    totals = CLASS_WEEKLY_TOTALS.get(code, {})
+    ranks = CLASS_WEEKLY_RANKS.get(code, {})
+    for wk, members in weeks.items():
+        minutes = members.pop(user, 0)
+        if minutes:
+            totals[wk] -= minutes
+            _rank_remove(ranks.get(wk, []), user, minutes)
+
+
+def class_leaderboard(code, n=LEADERBOARD_SIZE):
+    """Top-N this week: slice ng naka-maintain na sorted ranking, O(N)."""
+    wk = week_key(today())
+    ranks = CLASS_WEEKLY_RANKS.get(code, {}).get(wk, [])
+    top = [(u, -neg_minutes) for neg_minutes, u in ranks[:n]]
+    return {
+        "week": wk,
+        "total_minutes": CLASS_WEEKLY_TOTALS.get(code, {}).get(wk, 0),
+        "top": [
+            {
+                "username": u,
+                "fullname": USER_FULLNAME.get(u, u),
+                "minutes": minutes,
+                "streak": get_streak(u)["current"],
+            }
+            for u, minutes in top
+        ],
+    }
+
+
+# -------------------------
+# AT-RISK EARLY WARNING (background job)
+# -------------------------
+# Incremental: mga user lang na may bagong mood / study / emotion since
+# last run ang ini-score (RISK_DIRTY). Pag bagong araw, lahat ulit kasi
+# gumalaw ang 7-day window. Resulta ay naka-precompute per classroom
+# para O(1) ang basa sa analytics page ng Class Rep.
+RISK_JOB_INTERVAL = 300     # seconds
+RISK_THRESHOLD = 4
+NEGATIVE_EMOTIONS = {"Tired", "Sad", "Stressed", "Anxious", "Overwhelmed"}
+
+RISK_DIRTY = set()          # usernames na kailangang i-score ulit
+RISK_STATE = {"day": None}  # checkpoint
+USER_RISK = {}              # username -> {"score": n, "reasons": [...]}
+CLASS_ALERTS = {}           # code -> [alert dicts, highest score first]
+_RISK_LOCK = threading.Lock()
+
+
+def mark_risk_dirty(user):
+    with _RISK_LOCK:
+        RISK_DIRTY.add(user)
+
+
+def score_student(user):
+    """Sustained negative mood + classroom emotions + study collapse."""
+    today_d = today_date()
+    week = [(today_d - datetime.timedelta(days=i)).isoformat() for i in range(7)]
+    prev_week = [(today_d - datetime.timedelta(days=i)).isoformat() for i in range(7, 14)]
+
+    score = 0
+    reasons = []
+
+    moods = MOOD_LOGS.get(user, {})
+    bad_days = sum(1 for d in week if is_negative_mood(moods.get(d)))
+    if bad_days >= 3:
+        score += bad_days
+        reasons.append(f"{bad_days} mabigat na mood this week")
+
+    bad_emotions = 0
+    for code in USER_CLASSROOMS.get(user, []):
+        info = CLASS_EMOTIONS.get(code, {}).get(user)
+        if info and info["date"] in week and info["emotion"] in NEGATIVE_EMOTIONS:
+            bad_emotions += 1
+    if bad_emotions:
+        score += bad_emotions
+        reasons.append("negative classroom emotion")
+
+    totals = compute_study(user, week + prev_week)
+    this_week = sum(totals[d] for d in week)
+    last_week = sum(totals[d] for d in prev_week)
+    if last_week >= 60 and this_week < last_week * 0.3:
+        score += 3
+        reasons.append(f"study time dropped {last_week} → {this_week} min")
+
+    return {"score": score, "reasons": reasons}
+
+
+def run_risk_job():
+    """One incremental pass; returns how many students were scored."""
+    day = today()
+    with _RISK_LOCK:
+        if RISK_STATE["day"] != day:
+            # bagong araw: gumalaw ang window ng lahat
+            RISK_DIRTY.update(MOOD_LOGS, STUDY_LOGS)
+            for emotions in CLASS_EMOTIONS.values():
+                RISK_DIRTY.update(emotions)
+            RISK_STATE["day"] = day
+        dirty = list(RISK_DIRTY)
+        RISK_DIRTY.clear()
+
+    changed_codes = set()
+    for user in dirty:
+        result = score_student(user)
+        alert = result if result["score"] >= RISK_THRESHOLD else None
+        if USER_RISK.get(user) != alert:
+            if alert:
+                USER_RISK[user] = alert
+            else:
+                USER_RISK.pop(user, None)
+            changed_codes.update(USER_CLASSROOMS.get(user, []))
+
+    for code in changed_codes:
+        refresh_class_alerts(code)
+    return len(dirty)
+
+
+def refresh_class_alerts(code):
+    data = CLASSROOMS.get(code)
+    if not data:
+        CLASS_ALERTS.pop(code, None)
+        return
+    alerts = [
+        {
+            "username": u,
+            "fullname": USER_FULLNAME.get(u, u),
+            "score": USER_RISK[u]["score"],
+            "reasons": USER_RISK[u]["reasons"],
+        }
+        for u in class_members(code)
+        if u in USER_RISK and u != data["owner"]
+    ]
+    alerts.sort(key=lambda a: (-a["score"], a["username"]))
+    CLASS_ALERTS[code] = alerts
+
+
+def _risk_job_loop():
+    while True:
+        try:
+            run_risk_job()
+        except Exception:
+            app.logger.exception("at-risk job failed")
+        time.sleep(RISK_JOB_INTERVAL)
+
+
+# -------------------------
+# SEARCH (announcements + help messages)
+# -------------------------
+# Inverted index per classroom, ina-update pag may bagong post para hindi na
+# kailangang i-scan lahat ng messages sa bawat search.
+SEARCH_PAGE_SIZE = 10
+
+STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have he her his i if in is it its
+    me my no not of on or our she so that the their them they this to was we
+    were what when where which who will with you your
+    ako ang at ay ba din daw e eh ha hindi ito iyan iyon ka kami kasi kayo ko
+    kung lang mga mo na naman namin natin nga ng nila niya nung pa pag para po
+    rin sa sila siya tayo yan yung
+""".split())
+
+SEARCH_INDEX = {}   # code -> {token: {doc_id: term_count}}
+SEARCH_DOCS = {}    # code -> {doc_id: (kind, entry, length)}
+SEARCH_SEQ = {}     # code -> huling doc_id; per classroom, sunod sa pagkakasulat
+
+
+def tokenize(text):
+    return [t for t in re.findall(r"\w+", text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def index_message(code, kind, entry, doc_id=None):
+    """Add one announcement ("announcement") or help entry ("help") to the index."""
+    tokens = tokenize(entry.message)
+    if doc_id is None:
+        doc_id = SEARCH_SEQ[code] = SEARCH_SEQ.get(code, 0) + 1
+    SEARCH_DOCS.setdefault(code, {})[doc_id] = (kind, entry, len(tokens))
+    postings = SEARCH_INDEX.setdefault(code, {})
+    for token in tokens:
+        docs = postings.setdefault(token, {})
+        docs[doc_id] = docs.get(doc_id, 0) + 1
+
+
+def rebuild_search_index(code):
+    """Re-index a classroom from CLASS_ANNOUNCEMENTS / CLASS_HELP."""
+    # dating doc_id ng bawat entry ang gagamitin, para hindi mag-iba ang
+    # tie-break order pagkatapos ng rebuild; ang mga bago (import / bulk load)
+    # ay naka-sort by day, stable kaya sunod pa rin sa pagkakasulat ng list
+    with locked(classrooms=(code,)):
+        old_ids = {id(entry): doc_id for doc_id, (_, entry, _) in SEARCH_DOCS.pop(code, {}).items()}
+        SEARCH_INDEX.pop(code, None)
+        entries = [("announcement", e) for e in CLASS_ANNOUNCEMENTS.get(code, [])]
+        entries += [("help", e) for e in CLASS_HELP.get(code, [])]
+        entries.sort(key=lambda item: item[1].day)
+        for kind, entry in entries:
+            index_message(code, kind, entry, old_ids.get(id(entry)))
+
+
+def unindex_messages(code, doc_ids):
+    """Remove docs from the index; tokens lang nila ang ginagalaw."""
+    docs = SEARCH_DOCS.get(code, {})
+    postings = SEARCH_INDEX.get(code, {})
+    for doc_id in doc_ids:
+        _, entry, _ = docs.pop(doc_id)
+        for token in set(tokenize(entry.message)):
+            matches = postings.get(token)
+            if matches is None:
+                continue
+            matches.pop(doc_id, None)
+            if not matches:
+                del postings[token]
+
+
+def search_messages(code, query, page=1):
+    """
+    Ranked (tf-idf; kapag tie, mas bagong araw muna, tapos mas huling na-post),
+    paginated results.
+    Returns {"total": n, "page": p, "pages": n, "results": [...]}.
+    """
+    terms = set(tokenize(query))
+
+    # scoring under the stripe: binabago ng post / compaction ang postings;
+    # ang ranking at formatting ay sa labas na ng lock
+    scores = {}
+    with locked(classrooms=(code,)):
+        postings = SEARCH_INDEX.get(code, {})
+        docs = SEARCH_DOCS.get(code, {})
+        n_docs = len(docs) or 1
+        for term in terms:
+            matches = postings.get(term)
+            if not matches:
+                continue
+            idf = math.log(1 + n_docs / len(matches))
+            for doc_id, tf in matches.items():
+                length = docs[doc_id][2] or 1
+                scores[doc_id] = scores.get(doc_id, 0.0) + (tf / length) * idf
+        hits = [(score, doc_id) + docs[doc_id][:2] for doc_id, score in scores.items()]
+
+    total = len(hits)
+    pages = max(1, math.ceil(total / SEARCH_PAGE_SIZE))
+    page = min(max(page, 1), pages)
+    start = (page - 1) * SEARCH_PAGE_SIZE
+    ranked = heapq.nsmallest(
+        start + SEARCH_PAGE_SIZE, hits,
+        key=lambda hit: (-hit[0], -hit[3].day, -hit[1]),
+    )[start:]
+
+    results = []
+    for score, _, kind, entry in ranked:
+        results.append({
+            "kind": kind,
+            "message": entry.message,
+            "date": entry.date,
+            "time": getattr(entry, "time", ""),
+            # anonymous ang help messages
+            "sender": entry.sender if kind == "announcement" else None,
+            "score": round(score, 4),
+        })
+    return {"total": total, "page": page, "pages": pages, "results": results}
+
+
+# -------------------------
+# SHARED PAGE DATA (HTML + JSON API)
+# -------------------------
+def count_unseen_help(user):
+    """Bilang ng classroom help messages na hindi pa nakikita ni user."""
+    notif_count = 0
+    for code in USER_CLASSROOMS.get(user, []):
+        for msg in CLASS_HELP.get(code, []):
+            if user not in msg.seen_by:
+                notif_count += 1
+    return notif_count
+
+
+def add_study_record(user, record):
+    """Append a study log entry (timer or manual)."""
+    # class stripes din, kasi ina-update ang weekly totals ng classrooms;
+    # ulitin kung nag-join/leave si user habang kinukuha ang locks
+    while True:
+        codes = list(USER_CLASSROOMS.get(user, []))
+        with locked(users=(user,), classrooms=codes):
+            if USER_CLASSROOMS.get(user, []) == codes:
+                _append_study_record(user, record)
+                break
+    record_change(user, "study", record.as_dict())
+    mark_risk_dirty(user)
+
+
+def _append_study_record(user, record):
+    # caller holds the user stripe + stripes of all their classrooms
+    STUDY_LOGS.setdefault(user, [])
+    STUDY_LOGS[user].append(record)
+    track_study(user, record.date, record.minutes)
+    if record.date < USER_STREAKS[user]["last_date"]:
+        # backdated (hal. offline sync): hindi kaya ng incremental update
+        rebuild_streak(user)
+    bump_data_version(user)
+
+
+def record_study_session(user, study_seconds, rest_seconds, date=None):
+    """Save a finished timer session; returns the recorded minutes."""
+    minutes = round(study_seconds / 60)
+    if minutes > 0:
+        add_study_record(user, StudyRecord(date or today(), minutes, rest_seconds))
+    set_presence(user, "offline")
+    return minutes
+
+
+def save_mood(user, mood_text, date=None):
+    """Isang mood per araw; papalitan kung meron na."""
+    date = date or today()
+    with locked(users=(user,)):
+        MOOD_LOGS.setdefault(user, {})
+        MOOD_LOGS[user][date] = mood_text
+        bump_data_version(user)
+    record_change(user, "mood", {"date": date, "mood": mood_text})
+    mark_risk_dirty(user)
+
+
+def save_class_emotion(code, user, emotion):
+    """Record today's classroom emotion (PH time)."""
+    now = datetime.datetime.now(PH_TZ)
+    with locked(classrooms=(code,)):
+        CLASS_EMOTIONS.setdefault(code, {})
+        CLASS_EMOTIONS[code][user] = {
+            "emotion": emotion,
+            "date": now.date().isoformat(),
+            "time": now.strftime("%I:%M %p"),
+        }
+        info = CLASS_EMOTIONS[code][user]
+    record_change(user, "emotion", {"code": code, **info})
+    mark_risk_dirty(user)
+    hub_publish(code, "emotion", {
+        "username": user,
+        "fullname": USER_FULLNAME.get(user, user),
+        "pic": PROFILE_PICS.get(user),
+        **info,
+    })
+
+
+USER_DATA_VERSION = {}  # username -> int, bumped on every study/mood write
+SUMMARY_CACHE = {}      # username -> ((day, version), summary dict)
+
+
+def bump_data_version(user):
+    USER_DATA_VERSION[user] = USER_DATA_VERSION.get(user, 0) + 1
+
+
+def get_summary(user):
+    """
+    Cached build_summary(). Valid hanggang may bagong study/mood ni user
+    o magpalit ang araw (gumagalaw ang 7-day window at streak).
+    """
+    key = (today(), USER_DATA_VERSION.get(user, 0))
+    cached = SUMMARY_CACHE.get(user)
+    if cached and cached[0] == key:
+        return cached[1]
+    result = build_summary(user)
+    SUMMARY_CACHE[user] = (key, result)
+    return result
+
+
+def build_summary(user):
+    """7-day study/mood summary used by /summary and the API."""
+    days = last_7_days()
+    study_totals = compute_study(user, days)
+
+    rows = []
+    moods = []
+    for d in days:
+        mood_val = MOOD_LOGS.get(user, {}).get(d, "-")
+        moods.append(mood_val)
+        rows.append({
+            "date": d,
+            "mood": mood_val,
+            "minutes": study_totals[d],
+        })
+
+    avg = sum(study_totals.values()) / 7
+    advice = generate_advice(avg, moods)
+
+    total_study_minutes = sum(study_totals.values())
+
+    total_rest_seconds = 0
+    for log in STUDY_LOGS.get(user, []):
+        total_rest_seconds += log.rest_seconds
+    # kasama pa rin ang rest ng mga na-compact na records
+    for week in USER_ROLLUPS.get(user, {}).values():
+        total_rest_seconds += week["rest_seconds"]
+    total_rest_minutes = round(total_rest_seconds / 60)
+
+    if total_study_minutes == 0:
+        productivity = "No Study"
+    elif total_study_minutes < 30:
+        productivity = "Low Productivity"
+    elif total_study_minutes < 90:
+        productivity = "Moderately Productive"
+    else:
+        productivity = "Highly Productive"
+
+    if total_study_minutes == 0:
+        recommendation = "Start a small 5-minute study to build momentum."
+    elif total_rest_minutes > total_study_minutes:
+        recommendation = "You rested more than you studied. Try to focus more tomorrow."
+    elif total_study_minutes > 120:
+        recommendation = "Great job! But remember to take healthy breaks."
+    else:
+        recommendation = "Nice balance today. Keep your routine going!"
+
+    return {
+        "rows": rows,
+        "total": total_study_minutes,
+        "avg": round(avg, 2),
+        "advice": advice,
+        "total_study_minutes": total_study_minutes,
+        "total_rest_minutes": total_rest_minutes,
+        "productivity": productivity,
+        "recommendation": recommendation,
+        "streak": get_streak(user),
+    }
+
+
+def build_feelings_rows(code, data):
+    """Classmates na nag-share ng emotion TODAY, sorted by username."""
+    class_emotions = CLASS_EMOTIONS.get(code, {})
+    rows = []
+    today_str = today()
+
+    for member in sorted(class_members(code)):
+        info = class_emotions.get(member)
+        if info and info.get("date") == today_str:
+            rows.append({
+                "username": member,
+                "fullname": USER_FULLNAME.get(member, member),
+                "emotion": info["emotion"],
+                "date": info["date"],
+                "time": info.get("time", ""),
+                "pic": PROFILE_PICS.get(member),
+            })
+    return rows
+
+
+def post_class_help(code, user, text):
+    """Append an anonymous help message; the sender has already seen it."""
+    now = datetime.datetime.now(PH_TZ)
+    entry = HelpMessage(
+        text,
+        now.date().isoformat(),
+        now.strftime("%I:%M %p"),
+        seen_by=[user],   # sender has already "seen" it
+    )
+    with locked(classrooms=(code,)):
+        CLASS_HELP.setdefault(code, [])
+        CLASS_HELP[code].append(entry)
+        index_message(code, "help", entry)
+    hub_publish(code, "help", entry.as_dict())
+
+
+def post_announcement(code, user, text):
+    """Class Rep announcement para sa buong classroom."""
+    with locked(classrooms=(code,)):
+        CLASS_ANNOUNCEMENTS.setdefault(code, [])
+        CLASS_ANNOUNCEMENTS[code].append(
+            Announcement(USER_FULLNAME.get(user, user), text, today())
+        )
+        index_message(code, "announcement", CLASS_ANNOUNCEMENTS[code][-1])
+
+
+def mark_help_seen(code, user):
+    """Mark all help messages in a classroom as seen by user."""
+    with locked(classrooms=(code,)):
+        for h in CLASS_HELP.get(code, []):
+            if user not in h.seen_by:
+                h.seen_by.append(user)
+
+
+# message per top emotion (analytics page ng Class Rep)
+ANALYTICS_MESSAGES = {
+    "Happy": "Mukhang ang daming masaya this week — puwedeng i-acknowledge yan and celebrate small wins sa class!",
+    "Excited": "Maraming excited this week. Perfect time mag-intro ng bagong activity o project.",
+    "Calm": "Class looks calm overall. Pwede mo pang i-maintain yung peaceful pace ng klase.",
+    "Motivated": "Ang daming motivated! Sulitin, baka pwedeng magbigay ng konting challenge o enrichment task.",
+    "Tired": "Marami ang pagod. Maybe mag-start with a light warm-up o short breathing break sa class.",
+    "Sad": "Maraming nalulungkot this week. Baka helpful maglaan ng sandali to check in and encourage the class.",
+    "Stressed": "Most students feel stressed. Puwedeng mag-slow down ng konti, mag-clarify ng deadlines, o magbigay ng study tips.",
+    "Anxious": "Maraming kabado. Clear instructions and reassurance from you could really help.",
+    "Overwhelmed": "Madaming overwhelmed. Maybe i-break down yung tasks into smaller steps for them.",
+    "Bored": "Maraming bored. Puwede mong lagyan ng konting movement, games, o group activity ang lesson.",
+}
+
+
+def build_analytics(code):
+    """Emotion counts + top emotion insight for the last 7 days."""
+    days = last_7_days()
+    class_emotions = CLASS_EMOTIONS.get(code, {})
+
+    emotion_counts = {e: 0 for e in EMOTION_CHOICES}
+    detailed = []
+
+    for member, info in class_emotions.items():
+        date = info["date"]
+        emotion = info["emotion"]
+        if date in days:
+            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+            detailed.append({
+                "name": member,
+                "fullname": USER_FULLNAME.get(member, member),
+                "emotion": emotion,
+                "date": date,
+            })
+
+    top_emotion = None
+    top_count = 0
+    for emo, cnt in emotion_counts.items():
+        if cnt > top_count:
+            top_emotion = emo
+            top_count = cnt
+
+    if top_emotion and top_count > 0:
+        top_message = ANALYTICS_MESSAGES.get(
+            top_emotion,
+            f"Many students feel {top_emotion.lower()} this week. You might want to acknowledge this in class."
+        )
+    else:
+        top_emotion = None
+        top_message = "Wala pang sapat na data this week para makita ang overall mood ng class."
+
+    return {
+        "days": days,
+        "emotion_counts": emotion_counts,
+        "detailed": detailed,
+        "top_emotion": top_emotion,
+        "top_message": top_message,
+    }
+
+
 # -------------------------
 # CONTEXT PROCESSOR
 # -------------------------
@@ -178,8 +1092,16 @@ def register():
         fullname = request.form.get("fullname", "").strip().upper()
         u = request.form.get("username", "").strip()
         p = request.form.get("password", "").strip()
+        school = normalize_school(request.form.get("school"))
         file = request.files.get("photo")
 
+        # ibang shard ang may-ari ng school na ito
+        shard_url = foreign_shard_url(school)
+        if shard_url:
+            return redirect(shard_url + url_for("register"), code=307)
+        if not begin_tenant_write(school):
+            return tenant_frozen_response()
+
         # validation
         if not fullname or not u or not p:
             error = "Please fill in all fields."
@@ -205,8 +1127,8 @@ def register():
             STUDY_LOGS[u] = []
             HELP_REQUESTS[u] = []
             FRIENDS[u] = []
-            USER_STATUS[u] = "offline"
             USER_CLASSROOMS[u] = []
+            set_user_school(u, school)
 
             return redirect(url_for("login"))
 
@@ -221,12 +1143,18 @@ def login():
         u = request.form["username"].strip()
         p = request.form["password"].strip()
 
+        school = request.form.get("school", "").strip()
+        shard_url = foreign_shard_url(normalize_school(school)) if school else None
+        if shard_url:
+            return redirect(shard_url + url_for("login"), code=307)
+
         if USERS.get(u) == p:
             session["user"] = u
+            session["school"] = USER_SCHOOL.get(u, DEFAULT_SCHOOL)
             # clear previous settings
             session.pop("study_mode", None)
             session.pop("role", None)
-            USER_STATUS[u] = "offline"
+            set_presence(u, "offline")
             return redirect(url_for("mode"))
         else:
             error = "Invalid login."
@@ -238,11 +1166,16 @@ def login():
 def logout():
     user = session.get("user")
     if user:
-        USER_STATUS[user] = "offline"
+        set_presence(user, "offline")
         session.pop("user", None)
+        session.pop("school", None)
         session.pop("study_mode", None)
         session.pop("role", None)
-    return redirect(url_for("index"))
+    resp = redirect(url_for("index"))
+    # shared computers: burahin ang cached pages ng service worker (offline.js
+    # ang bahala kapag hindi supported ng browser ang header)
+    resp.headers["Clear-Site-Data"] = '"cache"'
+    return resp
 
 
 # -------------------------
@@ -274,19 +1207,12 @@ def dashboard():
     user = session["user"]
     full_name = USER_FULLNAME.get(user, user)
 
-    # Count unseen classroom help messages
-    notif_count = 0
-    for code in USER_CLASSROOMS.get(user, []):
-        for msg in CLASS_HELP.get(code, []):
-            if user not in msg.get("seen_by", []):
-                notif_count += 1
-
     return render_template(
         "dashboard.html",
         user=user,
         full_name=full_name,
         study_mode=session.get("study_mode"),
-        notif_count=notif_count,
+        notif_count=count_unseen_help(user),
     )
 
 
@@ -314,16 +1240,7 @@ def timer_done():
         study_seconds = 0
         rest_seconds = 0
 
-    minutes = round(study_seconds / 60)
-    if minutes > 0:
-        STUDY_LOGS.setdefault(user, [])
-        STUDY_LOGS[user].append({
-            "date": today(),
-            "minutes": minutes,
-            "rest_seconds": rest_seconds,
-        })
-
-    USER_STATUS[user] = "offline"
+    record_study_session(user, study_seconds, rest_seconds)
     return redirect(url_for("summary"))
 
 
@@ -333,7 +1250,16 @@ def set_status(state):
         return ("unauthorized", 401)
     if state not in ("studying", "resting", "offline"):
         return ("invalid", 400)
-    USER_STATUS[session["user"]] = state
+    set_presence(session["user"], state)
+    return ("", 204)
+
+
+@app.route("/presence/heartbeat", methods=["POST"])
+def presence_heartbeat():
+    """Timer page pings this habang bukas ang tab."""
+    if "user" not in session:
+        return ("unauthorized", 401)
+    heartbeat(session["user"])
     return ("", 204)
 
 
@@ -357,16 +1283,17 @@ def friends():
         elif friend not in USERS:
             error = "User does not exist."
         else:
-            # already friends?
-            if friend in FRIENDS.get(user, []):
-                msg = "You are already friends."
-            else:
-                pending_for_friend = FRIEND_REQUESTS.setdefault(friend, [])
-                if user in pending_for_friend:
-                    msg = "Friend request already sent."
+            with locked(users=(user, friend)):
+                # already friends?
+                if friend in FRIENDS.get(user, []):
+                    msg = "You are already friends."
                 else:
-                    pending_for_friend.append(user)
-                    msg = "Friend request sent!"
+                    pending_for_friend = FRIEND_REQUESTS.setdefault(friend, [])
+                    if user in pending_for_friend:
+                        msg = "Friend request already sent."
+                    else:
+                        pending_for_friend.append(user)
+                        msg = "Friend request sent!"
 
     # BUILD FRIEND LIST
     friend_list = FRIENDS.get(user, [])
@@ -398,18 +1325,19 @@ def accept_friend(sender):
         return redirect(url_for("login"))
 
     user = session["user"]
-    pending = FRIEND_REQUESTS.get(user, [])
-    if sender in pending:
-        pending.remove(sender)
-        if not pending:
-            FRIEND_REQUESTS.pop(user, None)
-
-        FRIENDS.setdefault(user, [])
-        FRIENDS.setdefault(sender, [])
-        if sender not in FRIENDS[user]:
-            FRIENDS[user].append(sender)
-        if user not in FRIENDS[sender]:
-            FRIENDS[sender].append(user)
+    with locked(users=(user, sender)):
+        pending = FRIEND_REQUESTS.get(user, [])
+        if sender in pending:
+            pending.remove(sender)
+            if not pending:
+                FRIEND_REQUESTS.pop(user, None)
+
+            FRIENDS.setdefault(user, [])
+            FRIENDS.setdefault(sender, [])
+            if sender not in FRIENDS[user]:
+                FRIENDS[user].append(sender)
+            if user not in FRIENDS[sender]:
+                FRIENDS[sender].append(user)
 
     return redirect(url_for("friends"))
 
@@ -420,11 +1348,12 @@ def decline_friend(sender):
         return redirect(url_for("login"))
 
     user = session["user"]
-    pending = FRIEND_REQUESTS.get(user, [])
-    if sender in pending:
-        pending.remove(sender)
-        if not pending:
-            FRIEND_REQUESTS.pop(user, None)
+    with locked(users=(user,)):
+        pending = FRIEND_REQUESTS.get(user, [])
+        if sender in pending:
+            pending.remove(sender)
+            if not pending:
+                FRIEND_REQUESTS.pop(user, None)
 
     return redirect(url_for("friends"))
 
@@ -440,8 +1369,7 @@ def mood():
     msg = None
     if request.method == "POST":
         mood_text = request.form["mood"].strip()
-        MOOD_LOGS.setdefault(session["user"], {})
-        MOOD_LOGS[session["user"]][today()] = mood_text
+        save_mood(session["user"], mood_text)
         msg = f"Mood '{mood_text}' saved for today."
 
     return render_template("mood.html", message=msg)
@@ -461,11 +1389,7 @@ def study():
             if minutes <= 0:
                 error = "Minutes must be positive."
             else:
-                STUDY_LOGS.setdefault(session["user"], [])
-                STUDY_LOGS[session["user"]].append({
-                    "date": today(),
-                    "minutes": minutes
-                })
+                add_study_record(session["user"], StudyRecord(today(), minutes))
                 msg = f"Recorded {minutes} minutes."
         except Exception:
             error = "Invalid number."
@@ -478,66 +1402,13 @@ def summary():
     if "user" not in session:
         return redirect(url_for("login"))
 
-    user = session["user"]
-    days = last_7_days()
-    study_totals = compute_study(user, days)
+    return render_template("summary.html", **get_summary(session["user"]))
 
-    rows = []
-    moods = []
-    for d in days:
-        mood_val = MOOD_LOGS.get(user, {}).get(d, "-")
-        moods.append(mood_val)
-        rows.append({
-            "date": d,
-            "mood": mood_val,
-            "minutes": study_totals[d],
-        })
 
-    avg = sum(study_totals.values()) / 7
-    advice = generate_advice(avg, moods)
-
-    total_study_minutes = sum(study_totals.values())
-
-    total_rest_seconds = 0
-    for log in STUDY_LOGS.get(user, []):
-        total_rest_seconds += log.get("rest_seconds", 0)
-    total_rest_minutes = round(total_rest_seconds / 60)
-
-    if total_study_minutes == 0:
-        productivity = "No Study"
-    elif total_study_minutes < 30:
-        productivity = "Low Productivity"
-    elif total_study_minutes < 90:
-        productivity = "Moderately Productive"
-    else:
-        productivity = "Highly Productive"
-
-    if total_study_minutes == 0:
-        recommendation = "Start a small 5-minute study to build momentum."
-    elif total_rest_minutes > total_study_minutes:
-        recommendation = "You rested more than you studied. Try to focus more tomorrow."
-    elif total_study_minutes > 120:
-        recommendation = "Great job! But remember to take healthy breaks."
-    else:
-        recommendation = "Nice balance today. Keep your routine going!"
-
-    return render_template(
-        "summary.html",
-        rows=rows,
-        total=total_study_minutes,
-        avg=round(avg, 2),
-        advice=advice,
-        total_study_minutes=total_study_minutes,
-        total_rest_minutes=total_rest_minutes,
-        productivity=productivity,
-        recommendation=recommendation,
-    )
-
-
-@app.route("/help", methods=["GET", "POST"])
-def help_page():
-    if "user" not in session:
-        return redirect(url_for("login"))
+@app.route("/help", methods=["GET", "POST"])
+def help_page():
+    if "user" not in session:
+        return redirect(url_for("login"))
 
     msg = None
     if request.method == "POST":
@@ -631,6 +1502,8 @@ def enter_classroom(code):
         code=code,
         class_name=data["name"],
         role=role,
+        presence=class_presence(code),
+        leaderboard=class_leaderboard(code),
     )
 
 
@@ -657,24 +1530,33 @@ def classroom_join_create():
                 error = "Class name is required."
             else:
                 code = generate_class_code()
-                CLASSROOMS[code] = {
-                    "name": name,
-                    "owner": user,
-                    "members": {user},
-                }
-                USER_CLASSROOMS.setdefault(user, []).append(code)
+                with locked(users=(user,), classrooms=(code,)):
+                    CLASSROOMS[code] = {
+                        "name": name,
+                        "owner": user,
+                        "members": {user},
+                        "school": USER_SCHOOL.get(user, DEFAULT_SCHOOL),
+                    }
+                    presence_join(user, code)
+                    leaderboard_join(user, code)
                 msg = f"Classroom created! Code: {code} (you are Class Rep)."
 
         elif action == "join":
             code = request.form.get("code", "").strip().upper()
-            if code not in CLASSROOMS:
-                error = "Classroom code not found."
-            else:
-                CLASSROOMS[code]["members"].add(user)
-                USER_CLASSROOMS.setdefault(user, [])
-                if code not in USER_CLASSROOMS[user]:
-                    USER_CLASSROOMS[user].append(code)
-                msg = f"Joined classroom {code} as Student."
+            with locked(users=(user,), classrooms=(code,)):
+                data = CLASSROOMS.get(code)
+                # classrooms ng ibang school ay hindi visible (tenant isolation)
+                if not data or data.get("school", DEFAULT_SCHOOL) != USER_SCHOOL.get(user, DEFAULT_SCHOOL):
+                    error = "Classroom code not found."
+                else:
+                    data["members"].add(user)
+                    if presence_join(user, code):
+                        leaderboard_join(user, code)
+                        mark_risk_dirty(user)
+                        # kung at-risk na siya dati, hindi magbabago ang USER_RISK
+                        # kaya hindi ito gagalawin ng risk job
+                        refresh_class_alerts(code)
+                    msg = f"Joined classroom {code} as Student."
 
     return render_template("classroom_manage.html", message=msg, error=error)
 
@@ -695,13 +1577,14 @@ def leave_classroom(code):
     if data.get("owner") == user:
         return "Class Rep cannot leave. Use Delete Classroom instead."
 
-    codes = USER_CLASSROOMS.get(user, [])
-    if code in codes:
-        codes.remove(code)
+    with locked(users=(user,), classrooms=(code,)):
+        if presence_leave(user, code):
+            leaderboard_leave(user, code)
 
-    members = data.get("members", [])
-    if user in members:
-        members.remove(user)
+        members = data.get("members", [])
+        if user in members:
+            members.remove(user)
+        refresh_class_alerts(code)
 
     return redirect(url_for("my_classrooms"))
 
@@ -731,22 +1614,23 @@ def classroom_delete(code):
         if real_pw is None or real_pw != pw:
             error = "Maling password. Classroom was not deleted."
         else:
-            # 1) alisin yung classroom sa list ng lahat ng members
-            members = list(data.get("members", []))
-            for m in members:
-                codes = USER_CLASSROOMS.get(m, [])
-                if code in codes:
-                    codes.remove(code)
-                USER_CLASSROOMS[m] = codes
-
-            # 2) burahin yung classroom mismo
-            CLASSROOMS.pop(code, None)
-
-            # 3) linisin related data kung meron
-            for store_name in ("CLASS_EMOTIONS", "CLASS_ANNOUNCEMENTS", "CLASS_HELP"):
-                store = globals().get(store_name)
-                if isinstance(store, dict):
-                    store.pop(code, None)
+            # kailangan hawak ang stripes ng lahat ng members; ulitin kung
+            # may nag-join habang kinukuha ang locks
+            while True:
+                members = class_members(code)
+                with locked(users=members, classrooms=(code,)):
+                    if CLASSROOMS.get(code) is not data:
+                        break  # na-delete na ng ibang request
+                    if set(data.get("members", [])) - set(members):
+                        continue
+
+                    # 1) alisin yung classroom sa list ng lahat ng members
+                    for m in members:
+                        presence_leave(m, code)
+
+                    # 2) burahin yung classroom mismo + related data
+                    drop_classroom_data(code)
+                break
 
             return redirect(url_for("my_classrooms"))
 
@@ -779,13 +1663,7 @@ def classroom_mood(code):
     if request.method == "POST":
         chosen = request.form.get("emotion")
         if chosen in EMOTION_CHOICES:
-            now = datetime.datetime.now(PH_TZ)
-            CLASS_EMOTIONS.setdefault(code, {})
-            CLASS_EMOTIONS[code][user] = {
-                "emotion": chosen,
-                "date": now.date().isoformat(),
-                "time": now.strftime("%I:%M %p"),
-            }
+            save_class_emotion(code, user, chosen)
             return redirect(url_for("classroom_feelings", code=code, emotion=chosen))
 
         return redirect(url_for("classroom_mood", code=code))
@@ -810,21 +1688,7 @@ def classroom_feelings(code):
     if not data or code not in USER_CLASSROOMS.get(user, []):
         return "You are not a member of this classroom."
 
-    class_emotions = CLASS_EMOTIONS.get(code, {})
-    rows = []
-    today_str = today()
-
-    for member in sorted(data["members"]):
-        info = class_emotions.get(member)
-        if info and info.get("date") == today_str:
-            rows.append({
-                "username": member,
-                "fullname": USER_FULLNAME.get(member, member),
-                "emotion": info["emotion"],
-                "date": info["date"],
-                "time": info.get("time", ""),
-                "pic": PROFILE_PICS.get(member),
-            })
+    rows = build_feelings_rows(code, data)
 
     role = "Class Rep" if data["owner"] == user else "Student"
     user_emotion = request.args.get("emotion")
@@ -860,22 +1724,11 @@ def classroom_help(code):
     if request.method == "POST":
         text = request.form.get("message", "").strip()
         if text:
-            now = datetime.datetime.now(PH_TZ)
-            CLASS_HELP.setdefault(code, [])
-            CLASS_HELP[code].append({
-                "message": text,
-                "date": now.date().isoformat(),
-                "time": now.strftime("%I:%M %p"),
-                "seen_by": [user],   # sender has already "seen" it
-            })
+            post_class_help(code, user, text)
             msg = "Your anonymous message has been sent to the classroom."
 
     # Mark all messages as seen by current user
-    for h in CLASS_HELP.get(code, []):
-        if "seen_by" not in h:
-            h["seen_by"] = []
-        if user not in h["seen_by"]:
-            h["seen_by"].append(user)
+    mark_help_seen(code, user)
 
     help_list = list(reversed(CLASS_HELP.get(code, [])))
 
@@ -912,12 +1765,7 @@ def classroom_announce(code):
         if not text:
             error = "Announcement cannot be empty."
         else:
-            CLASS_ANNOUNCEMENTS.setdefault(code, [])
-            CLASS_ANNOUNCEMENTS[code].append({
-                "sender": USER_FULLNAME.get(user, user),
-                "message": text,
-                "date": today(),
-            })
+            post_announcement(code, user, text)
             msg = "Announcement sent to the classroom."
 
     announcements = list(reversed(CLASS_ANNOUNCEMENTS.get(code, [])))
@@ -953,6 +1801,32 @@ def classroom_announcements(code):
     )
 
 
+# --------- CLASSROOM SEARCH ---------
+@app.route("/classroom/<code>/search")
+def classroom_search(code):
+    """Search announcements + anonymous help messages ng classroom."""
+    if "user" not in session:
+        return redirect(url_for("login"))
+
+    user = session["user"]
+    data = CLASSROOMS.get(code)
+
+    if not data or code not in USER_CLASSROOMS.get(user, []):
+        return "You are not a member of this classroom."
+
+    query = request.args.get("q", "").strip()
+    page = request.args.get("page", 1, type=int)
+    found = search_messages(code, query, page) if query else None
+
+    return render_template(
+        "classroom_search.html",
+        code=code,
+        class_name=data["name"],
+        query=query,
+        found=found,
+    )
+
+
 # --------- CLASSROOM ANALYTICS ---------
 @app.route("/classroom/<code>/analytics")
 def classroom_analytics(code):
@@ -969,64 +1843,1765 @@ def classroom_analytics(code):
     if data["owner"] != user:
         return "Only the Class Rep can view classroom analytics."
 
-    days = last_7_days()
-    class_emotions = CLASS_EMOTIONS.get(code, {})
+    return render_template(
+        "classroom_analytics.html",
+        code=code,
+        class_name=data["name"],
+        alerts=CLASS_ALERTS.get(code, []),
+        **build_analytics(code),
+    )
 
-    emotion_counts = {e: 0 for e in EMOTION_CHOICES}
-    detailed = []
 
-    for member, info in class_emotions.items():
-        date = info["date"]
-        emotion = info["emotion"]
-        if date in days:
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-            detailed.append({
-                "name": member,
-                "fullname": USER_FULLNAME.get(member, member),
-                "emotion": emotion,
-                "date": date,
-            })
+# -------------------------
+# JSON API (v1) para sa mobile client
+# -------------------------
+def _dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
 
-    top_emotion = None
-    top_count = 0
-    for emo, cnt in emotion_counts.items():
-        if cnt > top_count:
-            top_emotion = emo
-            top_count = cnt
 
-    if top_emotion and top_count > 0:
-        emotion_based_messages = {
-            "Happy": "Mukhang ang daming masaya this week — puwedeng i-acknowledge yan and celebrate small wins sa class!",
-            "Excited": "Maraming excited this week. Perfect time mag-intro ng bagong activity o project.",
-            "Calm": "Class looks calm overall. Pwede mo pang i-maintain yung peaceful pace ng klase.",
-            "Motivated": "Ang daming motivated! Sulitin, baka pwedeng magbigay ng konting challenge o enrichment task.",
-            "Tired": "Marami ang pagod. Maybe mag-start with a light warm-up o short breathing break sa class.",
-            "Sad": "Maraming nalulungkot this week. Baka helpful maglaan ng sandali to check in and encourage the class.",
-            "Stressed": "Most students feel stressed. Puwedeng mag-slow down ng konti, mag-clarify ng deadlines, o magbigay ng study tips.",
-            "Anxious": "Maraming kabado. Clear instructions and reassurance from you could really help.",
-            "Overwhelmed": "Madaming overwhelmed. Maybe i-break down yung tasks into smaller steps for them.",
-            "Bored": "Maraming bored. Puwede mong lagyan ng konting movement, games, o group activity ang lesson.",
-        }
-        top_message = emotion_based_messages.get(
-            top_emotion,
-            f"Many students feel {top_emotion.lower()} this week. You might want to acknowledge this in class."
+def api_response(payload, status=200):
+    """
+    Compact JSON response.
+    - ?fields=a,b  -> top-level field selection
+    - GET responses get an ETag; matching If-None-Match returns 304 (no body)
+    """
+    fields = request.args.get("fields")
+    if fields and isinstance(payload, dict) and status == 200:
+        wanted = {f.strip() for f in fields.split(",") if f.strip()}
+        payload = {k: v for k, v in payload.items() if k in wanted}
+
+    body = _dumps(payload)
+    resp = app.response_class(body, status=status, mimetype="application/json")
+    if request.method == "GET" and status == 200:
+        resp.set_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
+        resp.headers["Cache-Control"] = "private, no-cache"
+        resp.make_conditional(request)
+    return resp
+
+
+def api_error(message, status):
+    return api_response({"error": message}, status=status)
+
+
+def _api_classroom(code):
+    """Returns (user, classroom data, None) or (None, None, error response)."""
+    user = session.get("user")
+    if not user:
+        return None, None, api_error("unauthorized", 401)
+    data = CLASSROOMS.get(code)
+    if not data:
+        return None, None, api_error("Classroom does not exist.", 404)
+    if code not in USER_CLASSROOMS.get(user, []):
+        return None, None, api_error("You are not a member of this classroom.", 403)
+    return user, data, None
+
+
+@app.route("/api/v1/dashboard")
+def api_dashboard():
+    user = session.get("user")
+    if not user:
+        return api_error("unauthorized", 401)
+    return api_response({
+        "user": user,
+        "full_name": USER_FULLNAME.get(user, user),
+        "study_mode": session.get("study_mode"),
+        "notif_count": count_unseen_help(user),
+    })
+
+
+@app.route("/api/v1/summary")
+def api_summary():
+    user = session.get("user")
+    if not user:
+        return api_error("unauthorized", 401)
+    return api_response(get_summary(user))
+
+
+@app.route("/api/v1/timer_done", methods=["POST"])
+def api_timer_done():
+    user = session.get("user")
+    if not user:
+        return api_error("unauthorized", 401)
+
+    payload = request.get_json(silent=True)
+    if payload is None:
+        payload = request.form
+    elif not isinstance(payload, dict):
+        return api_error("Expected a JSON object or form fields.", 400)
+    try:
+        study_seconds = int(payload.get("study_seconds", 0))
+        rest_seconds = int(payload.get("rest_seconds", 0))
+    except (TypeError, ValueError):
+        return api_error("study_seconds and rest_seconds must be integers.", 400)
+
+    minutes = record_study_session(user, study_seconds, rest_seconds)
+    return api_response({"minutes": minutes})
+
+
+@app.route("/api/v1/classroom/<code>/feelings")
+def api_classroom_feelings(code):
+    user, data, error = _api_classroom(code)
+    if error:
+        return error
+    return api_response({
+        "code": code,
+        "class_name": data["name"],
+        "role": "Class Rep" if data["owner"] == user else "Student",
+        "rows": build_feelings_rows(code, data),
+    })
+
+
+@app.route("/api/v1/classroom/<code>/help", methods=["GET", "POST"])
+def api_classroom_help(code):
+    user, data, error = _api_classroom(code)
+    if error:
+        return error
+
+    if request.method == "POST":
+        payload = request.get_json(silent=True) or request.form
+        text = str(payload.get("message", "")).strip()
+        if not text:
+            return api_error("Message cannot be empty.", 400)
+        post_class_help(code, user, text)
+
+    mark_help_seen(code, user)
+    # anonymous: message/date/time lang, walang seen_by
+    help_list = [h.as_dict() for h in reversed(CLASS_HELP.get(code, []))]
+    return api_response(
+        {"code": code, "class_name": data["name"], "help_list": help_list},
+        status=201 if request.method == "POST" else 200,
+    )
+
+
+@app.route("/api/v1/classroom/<code>/analytics")
+def api_classroom_analytics(code):
+    user, data, error = _api_classroom(code)
+    if error:
+        return error
+    if data["owner"] != user:
+        return api_error("Only the Class Rep can view classroom analytics.", 403)
+    payload = {"code": code, "class_name": data["name"], "alerts": CLASS_ALERTS.get(code, [])}
+    payload.update(build_analytics(code))
+    return api_response(payload)
+
+
+@app.route("/api/v1/classroom/<code>/search")
+def api_classroom_search(code):
+    user, data, error = _api_classroom(code)
+    if error:
+        return error
+    query = request.args.get("q", "").strip()
+    if not query:
+        return api_error("q is required.", 400)
+    payload = {"code": code, "query": query}
+    payload.update(search_messages(code, query, request.args.get("page", 1, type=int)))
+    return api_response(payload)
+
+
+@app.route("/api/v1/classroom/<code>/leaderboard")
+def api_classroom_leaderboard(code):
+    user, data, error = _api_classroom(code)
+    if error:
+        return error
+    try:
+        n = min(max(int(request.args.get("n", LEADERBOARD_SIZE)), 1), 50)
+    except ValueError:
+        return api_error("n must be an integer.", 400)
+    payload = {"code": code, "class_name": data["name"]}
+    payload.update(class_leaderboard(code, n))
+    return api_response(payload)
+
+
+# -------------------------
+# BATCH TIMER INGESTION
+# -------------------------
+IDEMPOTENCY_WINDOW = 500   # ilang event ids ang tanda per user
+MAX_BATCH_EVENTS = 200
+
+PROCESSED_EVENTS = {}      # username -> OrderedDict(event_id -> True)
+
+
+def _seen_event(user, event_id):
+    """True kung na-apply na dati ang event_id (retry from flaky Wi-Fi)."""
+    with locked(users=(user,)):
+        seen = PROCESSED_EVENTS.setdefault(user, collections.OrderedDict())
+        if event_id in seen:
+            return True
+        seen[event_id] = True
+        if len(seen) > IDEMPOTENCY_WINDOW:
+            seen.popitem(last=False)
+        return False
+
+
+def apply_timer_events(user, events):
+    """
+    Apply status transitions and completed sessions in order, in one pass.
+    Each event: {"id": str, "type": "status", "state": ...}
+             or {"id": str, "type": "session", "study_seconds": int, "rest_seconds": int}
+    """
+    applied = 0
+    duplicates = 0
+    rejected = []
+
+    for event in events:
+        if not isinstance(event, dict):
+            rejected.append(None)
+            continue
+        event_id = str(event.get("id") or "")
+        kind = event.get("type")
+
+        if not event_id:
+            rejected.append(None)
+            continue
+
+        if kind == "status":
+            state = event.get("state")
+            if state not in ("studying", "resting", "offline"):
+                rejected.append(event_id)
+                continue
+            if _seen_event(user, event_id):
+                duplicates += 1
+                continue
+            set_presence(user, state)
+        elif kind == "session":
+            try:
+                study_seconds = int(event.get("study_seconds", 0))
+                rest_seconds = int(event.get("rest_seconds", 0))
+            except (TypeError, ValueError):
+                rejected.append(event_id)
+                continue
+            if _seen_event(user, event_id):
+                duplicates += 1
+                continue
+            record_study_session(user, study_seconds, rest_seconds)
+        else:
+            rejected.append(event_id)
+            continue
+        applied += 1
+
+    return {
+        "applied": applied,
+        "duplicates": duplicates,
+        "rejected": rejected,
+        "status": USER_STATUS.get(user, "offline"),
+    }
+
+
+@app.route("/api/v1/timer/batch", methods=["POST"])
+def api_timer_batch():
+    user = session.get("user")
+    if not user:
+        return api_error("unauthorized", 401)
+
+    payload = request.get_json(silent=True)
+    events = payload.get("events") if isinstance(payload, dict) else None
+    if not isinstance(events, list):
+        return api_error("Expected a JSON body with an 'events' list.", 400)
+    if len(events) > MAX_BATCH_EVENTS:
+        return api_error(f"At most {MAX_BATCH_EVENTS} events per batch.", 413)
+
+    return api_response(apply_timer_events(user, events))
+
+
+# -------------------------
+# OFFLINE SYNC (service worker + delta sync)
+# -------------------------
+SYNC_JOURNAL_SIZE = 200    # ilang recent changes ang tanda per user
+SYNC_MAX_AGE_DAYS = 7      # gaano katagal pwedeng naka-queue offline
+
+USER_JOURNAL = {}          # username -> deque[(seq, kind, payload)]
+_JOURNAL_SEQ = itertools.count(1)
+
+
+def record_change(user, kind, payload):
+    """Journal a write so other devices can pull it as a delta."""
+    with locked(users=(user,)):
+        journal = USER_JOURNAL.setdefault(user, collections.deque(maxlen=SYNC_JOURNAL_SIZE))
+        journal.append((next(_JOURNAL_SEQ), kind, payload))
+
+
+def changes_since(user, cursor):
+    """
+    Returns (new_cursor, changes, reset).
+    reset=True kapag luma na ang cursor (na-drop na sa journal o galing sa
+    lumang server process) -> dapat mag-full reload ang client.
+    """
+    # kopya under the user stripe: ina-append ito ng record_change habang nagsi-sync
+    with locked(users=(user,)):
+        journal = USER_JOURNAL.get(user)
+        maxlen = journal.maxlen if journal is not None else None
+        journal = list(journal or ())
+    if not journal:
+        return cursor, [], False
+
+    latest = journal[-1][0]
+    reset = cursor > latest or (
+        len(journal) == maxlen and cursor < journal[0][0] - 1
+    )
+    changes = [
+        {"seq": seq, "kind": kind, "data": payload}
+        for seq, kind, payload in journal
+        if reset or seq > cursor
+    ]
+    return latest, changes, reset
+
+
+def _sync_date(value):
+    """ISO date within the last SYNC_MAX_AGE_DAYS days, else None."""
+    try:
+        d = datetime.date.fromisoformat(str(value))
+    except ValueError:
+        return None
+    today_d = today_date()
+    if d > today_d or (today_d - d).days > SYNC_MAX_AGE_DAYS:
+        return None
+    return d.isoformat()
+
+
+def apply_sync(user, payload):
+    """Apply queued offline moods, study sessions and classroom emotions."""
+    applied = 0
+    duplicates = 0
+    rejected = []
+
+    def accept(entry):
+        nonlocal duplicates
+        if not isinstance(entry, dict) or not entry.get("id"):
+            rejected.append(None)
+            return None
+        event_id = str(entry["id"])
+        date = _sync_date(entry.get("date", today()))
+        if date is None:
+            rejected.append(event_id)
+            return None
+        if _seen_event(user, event_id):
+            duplicates += 1
+            return None
+        return date
+
+    for entry in payload.get("moods") or []:
+        mood_text = str(entry.get("mood", "")).strip() if isinstance(entry, dict) else ""
+        if not mood_text:
+            rejected.append(entry.get("id") if isinstance(entry, dict) else None)
+            continue
+        date = accept(entry)
+        if date:
+            save_mood(user, mood_text, date)
+            applied += 1
+
+    for entry in payload.get("sessions") or []:
+        try:
+            study_seconds = int(entry.get("study_seconds", 0))
+            rest_seconds = int(entry.get("rest_seconds", 0))
+        except (AttributeError, TypeError, ValueError):
+            rejected.append(entry.get("id") if isinstance(entry, dict) else None)
+            continue
+        date = accept(entry)
+        if date:
+            record_study_session(user, study_seconds, rest_seconds, date=date)
+            applied += 1
+
+    for entry in payload.get("emotions") or []:
+        if not isinstance(entry, dict):
+            rejected.append(None)
+            continue
+        if str(entry.get("id")) in PROCESSED_EVENTS.get(user, ()):
+            duplicates += 1
+            continue
+        code = str(entry.get("code", ""))
+        emotion = entry.get("emotion")
+        existing = CLASS_EMOTIONS.get(code, {}).get(user)
+        if (
+            code not in USER_CLASSROOMS.get(user, [])
+            or emotion not in EMOTION_CHOICES
+            or entry.get("date", today()) != today()
+            or (existing and existing["date"] == today())
+        ):
+            rejected.append(entry.get("id"))
+            continue
+        if accept(entry):
+            save_class_emotion(code, user, emotion)
+            applied += 1
+
+    return {"applied": applied, "duplicates": duplicates, "rejected": rejected}
+
+
+@app.route("/api/v1/sync", methods=["POST"])
+def api_sync():
+    """
+    Single delta request from the offline queue (offline.js).
+    Body: {"cursor": int, "moods": [...], "sessions": [...], "emotions": [...]}
+    """
+    user = session.get("user")
+    if not user:
+        return api_error("unauthorized", 401)
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return api_error("Expected a JSON object.", 400)
+    try:
+        cursor = int(payload.get("cursor") or 0)
+    except (TypeError, ValueError):
+        return api_error("cursor must be an integer.", 400)
+
+    total = sum(len(payload.get(k) or []) for k in ("moods", "sessions", "emotions"))
+    if total > MAX_BATCH_EVENTS:
+        return api_error(f"At most {MAX_BATCH_EVENTS} entries per sync.", 413)
+
+    result = apply_sync(user, payload)
+    result["cursor"], result["changes"], result["reset"] = changes_since(user, cursor)
+    return api_response(result)
+
+
+@app.route("/sw.js")
+def service_worker():
+    """Service worker served from the root para sakop ang buong site."""
+    resp = app.response_class(render_template("sw.js"), mimetype="application/javascript")
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+# -------------------------
+# ASGI MODE + STREAMING (push endpoints)
+# -------------------------
+# WSGI pa rin ang default (gunicorn app:app). Para sa maraming bukas na
+# connection:  uvicorn app:asgi_app  (pip install -r requirements-optional.txt)
+# Sa ASGI mode, ang mga route sa ASYNC_ROUTES ay native async at iisang
+# event loop (yung sa server) ang gamit ng lahat ng streams, kaya walang
+# thread na naka-hold per open connection. Ang read-heavy pages sa
+# READ_ENDPOINTS ay sync Flask views pa rin (template render, locks, pins
+# file), kaya sa sariling threadpool sila (READ_VIEW_THREADS) at hindi sa
+# loop. Lahat ng iba ay dumadaan sa Flask app gamit ang WsgiToAsgi, na
+# iisang thread lang ang gamit para sa lahat ng request.
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:  # optional, ASGI mode lang
+    WsgiToAsgi = None
+
+STREAM_INTERVAL = 2        # seconds between presence checks
+STREAM_KEEPALIVE = 15      # seconds between SSE comments kapag walang bago
+
+ASYNC_ROUTES = []          # [(compiled path regex, async handler)]
+
+
+def async_route(pattern):
+    """Register a native async handler for ASGI mode."""
+    def decorator(fn):
+        ASYNC_ROUTES.append((re.compile(pattern), fn))
+        return fn
+    return decorator
+
+
+def sse_frame(event, payload):
+    return f"event: {event}\ndata: {_dumps(payload).decode('utf-8')}\n\n".encode("utf-8")
+
+
+def is_member(user, code):
+    return code in CLASSROOMS and code in USER_CLASSROOMS.get(user, [])
+
+
+def session_from_cookie(cookie_header):
+    """Basahin ang Flask session cookie nang walang request context (ASGI)."""
+    value = parse_cookie(cookie_header).get(app.config["SESSION_COOKIE_NAME"])
+    if not value:
+        return {}
+    serializer = app.session_interface.get_signing_serializer(app)
+    try:
+        return serializer.loads(
+            value, max_age=int(app.permanent_session_lifetime.total_seconds())
         )
-    else:
-        top_emotion = None
-        top_message = "Wala pang sapat na data this week para makita ang overall mood ng class."
+    except BadSignature:
+        return {}
 
-    return render_template(
-        "classroom_analytics.html",
-        code=code,
-        class_name=data["name"],
-        days=days,
-        emotion_counts=emotion_counts,
-        detailed=detailed,
-        top_emotion=top_emotion,
-        top_message=top_message,
+
+def presence_frame(code, last):
+    """SSE frame kung nagbago ang counts, else None."""
+    snapshot = class_presence(code)
+    if snapshot == last:
+        return None, last
+    return sse_frame("presence", snapshot), snapshot
+
+
+# ---- WSGI versions (isang worker thread per open stream) ----
+@app.route("/api/v1/classroom/<code>/presence")
+def api_classroom_presence(code):
+    user, data, error = _api_classroom(code)
+    if error:
+        return error
+    return api_response({"code": code, "presence": class_presence(code)})
+
+
+@app.route("/classroom/<code>/presence/stream")
+def classroom_presence_stream(code):
+    user = session.get("user")
+    if not user:
+        return ("unauthorized", 401)
+    if not is_member(user, code):
+        return ("forbidden", 403)
+
+    def generate():
+        last = None
+        idle = 0
+        while True:
+            frame, last = presence_frame(code, last)
+            if frame:
+                idle = 0
+                yield frame
+            elif idle >= STREAM_KEEPALIVE:
+                idle = 0
+                yield b": keepalive\n\n"
+            time.sleep(STREAM_INTERVAL)
+            idle += STREAM_INTERVAL
+
+    return app.response_class(
+        generate(), mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ---- ASGI versions ----
+async def _send_plain(send, status, body, content_type=b"text/plain; charset=utf-8"):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", content_type)]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_redirect(send, location, status=307):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"location", location.encode("latin-1")),
+                            (b"content-type", b"text/plain; charset=utf-8")]})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _scope_full_path(scope):
+    query = scope.get("query_string") or b""
+    path = urllib.parse.quote(scope.get("root_path", "") + scope["path"])
+    return path + ("?" + query.decode("latin-1") if query else "")
+
+
+async def _wait_disconnect(receive, disconnected):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            disconnected.set()
+            return
+
+
+async def _stream_sse(receive, send, next_frame):
+    """
+    Run an SSE response on the shared loop until the client disconnects.
+    next_frame() -> bytes or None, tinatawag every STREAM_INTERVAL seconds.
+    """
+    await send({"type": "http.response.start", "status": 200, "headers": [
+        (b"content-type", b"text/event-stream"),
+        (b"cache-control", b"no-cache"),
+        (b"x-accel-buffering", b"no"),
+    ]})
+    disconnected = asyncio.Event()
+    watcher = asyncio.ensure_future(_wait_disconnect(receive, disconnected))
+    idle = 0
+    try:
+        while not disconnected.is_set():
+            frame = next_frame()
+            if frame:
+                idle = 0
+                await send({"type": "http.response.body", "body": frame, "more_body": True})
+            elif idle >= STREAM_KEEPALIVE:
+                idle = 0
+                await send({"type": "http.response.body", "body": b": keepalive\n\n", "more_body": True})
+            try:
+                await asyncio.wait_for(disconnected.wait(), timeout=STREAM_INTERVAL)
+            except asyncio.TimeoutError:
+                idle += STREAM_INTERVAL
+    finally:
+        watcher.cancel()
+
+
+@async_route(r"^/api/v1/classroom/(?P<code>[^/]+)/presence$")
+async def async_classroom_presence(scope, receive, send, user, code):
+    if not is_member(user, code):
+        return await _send_plain(send, 403, _dumps({"error": "You are not a member of this classroom."}),
+                                 b"application/json")
+    body = _dumps({"code": code, "presence": class_presence(code)})
+    await _send_plain(send, 200, body, b"application/json")
+
+
+@async_route(r"^/classroom/(?P<code>[^/]+)/presence/stream$")
+async def async_presence_stream(scope, receive, send, user, code):
+    if not is_member(user, code):
+        return await _send_plain(send, 403, b"forbidden")
+
+    state = {"last": None}
+
+    def next_frame():
+        frame, state["last"] = presence_frame(code, state["last"])
+        return frame
+
+    await _stream_sse(receive, send, next_frame)
+
+
+# ---- LIVE CLASSROOM BOARD (broadcast hub) ----
+# Bawat subscriber (bukas na stream ng Class Rep) ay may sariling bounded
+# queue. Kapag mabagal ang client at puno na, tinatapon ang pinakaluma at
+# sinasabihan ang client ("lagged") para mag-reload; kapag sobra na ang
+# natapon, dinidisconnect para hindi bumigat ang publishers.
+HUB_QUEUE_SIZE = 100
+HUB_MAX_DROPPED = 500
+
+HUB_SUBSCRIBERS = {}       # code -> set(Subscriber)
+_HUB_LOCK = threading.Lock()
+
+
+class Subscriber:
+    """One open live stream; safe to feed from any thread."""
+
+    def __init__(self, code, loop=None):
+        self.code = code
+        self.frames = collections.deque()
+        self.dropped = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._loop = loop
+        self._async_ready = asyncio.Event() if loop is not None else None
+
+    def offer(self, frame):
+        with self._lock:
+            if len(self.frames) >= HUB_QUEUE_SIZE:
+                self.frames.popleft()
+                self.dropped += 1
+                if self.dropped > HUB_MAX_DROPPED:
+                    self.closed = True
+            self.frames.append(frame)
+        self._ready.set()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._async_ready.set)
+
+    def drain(self):
+        """Return pending frames (plus a 'lagged' notice kung may natapon)."""
+        with self._lock:
+            frames = list(self.frames)
+            self.frames.clear()
+            dropped, self.dropped = self.dropped, 0
+            self._ready.clear()
+            if self._async_ready is not None:
+                self._async_ready.clear()
+        if dropped:
+            frames.insert(0, sse_frame("lagged", {"dropped": dropped}))
+        return frames
+
+    def wait(self, timeout):
+        return self._ready.wait(timeout)
+
+    async def wait_async(self, timeout):
+        try:
+            await asyncio.wait_for(self._async_ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+def hub_subscribe(code, loop=None):
+    sub = Subscriber(code, loop)
+    with _HUB_LOCK:
+        HUB_SUBSCRIBERS.setdefault(code, set()).add(sub)
+    return sub
+
+
+def hub_unsubscribe(sub):
+    with _HUB_LOCK:
+        subs = HUB_SUBSCRIBERS.get(sub.code)
+        if subs:
+            subs.discard(sub)
+            if not subs:
+                HUB_SUBSCRIBERS.pop(sub.code, None)
+
+
+def hub_publish(code, event, payload):
+    """Fan out one event to every live stream of a classroom."""
+    subs = HUB_SUBSCRIBERS.get(code)
+    if not subs:
+        return
+    frame = sse_frame(event, payload)
+    with _HUB_LOCK:
+        subs = list(subs)
+    for sub in subs:
+        sub.offer(frame)
+
+
+def _live_access(user, code):
+    """None kung pwede, else (status, message)."""
+    data = CLASSROOMS.get(code)
+    if not data or not is_member(user, code):
+        return 403, "You are not a member of this classroom."
+    if data["owner"] != user:
+        return 403, "Only the Class Rep can watch the live board."
+    return None
+
+
+@app.route("/classroom/<code>/live")
+def classroom_live(code):
+    """Class Rep: live emotion + help events (Server-Sent Events)."""
+    user = session.get("user")
+    if not user:
+        return ("unauthorized", 401)
+    denied = _live_access(user, code)
+    if denied:
+        return (denied[1], denied[0])
+
+    sub = hub_subscribe(code)
+
+    def generate():
+        try:
+            yield b": connected\n\n"
+            while not sub.closed:
+                if sub.wait(STREAM_KEEPALIVE):
+                    for frame in sub.drain():
+                        yield frame
+                else:
+                    yield b": keepalive\n\n"
+        finally:
+            hub_unsubscribe(sub)
+
+    return app.response_class(
+        generate(), mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@async_route(r"^/classroom/(?P<code>[^/]+)/live$")
+async def async_classroom_live(scope, receive, send, user, code):
+    denied = _live_access(user, code)
+    if denied:
+        return await _send_plain(send, denied[0], denied[1].encode("utf-8"))
+
+    sub = hub_subscribe(code, loop=asyncio.get_running_loop())
+    await send({"type": "http.response.start", "status": 200, "headers": [
+        (b"content-type", b"text/event-stream"),
+        (b"cache-control", b"no-cache"),
+        (b"x-accel-buffering", b"no"),
+    ]})
+    disconnected = asyncio.Event()
+    watcher = asyncio.ensure_future(_wait_disconnect(receive, disconnected))
+    try:
+        await send({"type": "http.response.body", "body": b": connected\n\n", "more_body": True})
+        while not disconnected.is_set() and not sub.closed:
+            await sub.wait_async(STREAM_KEEPALIVE)
+            frames = sub.drain() or [b": keepalive\n\n"]
+            await send({"type": "http.response.body", "body": b"".join(frames), "more_body": True})
+    finally:
+        watcher.cancel()
+        hub_unsubscribe(sub)
+
+
+_WSGI_AS_ASGI = WsgiToAsgi(app) if WsgiToAsgi is not None else None
+
+# Read-heavy GET views: sabay-sabay sa READ_VIEW_THREADS threads, imbes na
+# pumila sa iisang thread ng WsgiToAsgi. Hindi sa event loop mismo: may
+# template render, stripe locks at stat ng pins file, na magpapahinto sa
+# lahat ng bukas na streams. Buong Flask pipeline pa rin (session,
+# before/after_request).
+READ_VIEW_THREADS = 8
+READ_ENDPOINTS = {
+    "dashboard", "summary", "classroom_feelings", "classroom_analytics",
+    "api_dashboard", "api_summary", "api_classroom_feelings", "api_classroom_analytics",
+}
+_READ_URLS = app.url_map.bind("localhost")
+_READ_POOL = concurrent.futures.ThreadPoolExecutor(READ_VIEW_THREADS, thread_name_prefix="read-view")
+
+
+def _scope_environ(scope):
+    """Minimal WSGI environ for a bodyless ASGI GET."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(b""),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers") or []:
+        key = name.decode("latin-1").upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = "HTTP_" + key
+        value = value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _read_endpoint(scope):
+    if scope["method"] not in ("GET", "HEAD"):
+        return None
+    try:
+        endpoint, _ = _READ_URLS.match(scope["path"], method="GET")
+    except HTTPException:  # NotFound / redirects: bahala ang Flask
+        return None
+    return endpoint if endpoint in READ_ENDPOINTS else None
+
+
+def _run_wsgi(environ):
+    """Call the Flask app synchronously; returns (status, headers, body)."""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [
+            (k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers
+        ]
+
+    result = app.wsgi_app(environ, start_response)
+    try:
+        body = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return started, body
+
+
+async def async_read_view(scope, receive, send):
+    """Run a read-only Flask view on the read pool, off the event loop."""
+    loop = asyncio.get_running_loop()
+    started, body = await loop.run_in_executor(_READ_POOL, _run_wsgi, _scope_environ(scope))
+    await send({"type": "http.response.start", "status": started["status"],
+                "headers": started["headers"]})
+    await send({"type": "http.response.body",
+                "body": b"" if scope["method"] == "HEAD" else body})
+
+
+async def asgi_app(scope, receive, send):
+    """ASGI entry point: native async routes, then the Flask app."""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                start_background_workers()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] == "http" and scope["method"] == "GET":
+        for pattern, handler in ASYNC_ROUTES:
+            match = pattern.match(scope["path"])
+            if not match:
+                continue
+            headers = dict(scope.get("headers") or [])
+            data = session_from_cookie(headers.get(b"cookie", b"").decode("latin-1"))
+            user = data.get("user")
+            if not user:
+                return await _send_plain(send, 401, b"unauthorized")
+            # parehong routing ng route_tenant (GET lang ito, kaya walang freeze check)
+            base = foreign_shard_url(data["school"]) if data.get("school") else None
+            if base:
+                return await _send_redirect(send, base + _scope_full_path(scope))
+            return await handler(scope, receive, send, user, **match.groupdict())
+
+    if scope["type"] == "http" and _read_endpoint(scope):
+        return await async_read_view(scope, receive, send)
+
+    if _WSGI_AS_ASGI is None:
+        raise RuntimeError("ASGI mode needs asgiref: pip install asgiref")
+    await _WSGI_AS_ASGI(scope, receive, send)
+
+
+# -------------------------
+# MULTI-TENANT SHARDING (by school)
+# -------------------------
+# Bawat school ay tenant. Sa isang process lang (default) walang sharding.
+# Para sa maraming process / nodes, pare-pareho ang env sa lahat:
+#   UNIVERCYCLE_SHARDS="a=http://127.0.0.1:5001,b=http://127.0.0.1:5002"
+#   UNIVERCYCLE_SHARD=a               (pangalan ng process na ito)
+#   UNIVERCYCLE_SHARD_PINS=pins.json  (optional; school -> shard overrides)
+#   UNIVERCYCLE_SHARD_TOKEN=...       (para sa /admin/tenants endpoints)
+# Consistent hashing ang default na placement ng school; ang pins ay para sa
+# mga school na inilipat ng `flask move-tenant`. Kapag ang request ay para sa
+# school na nasa ibang shard, 307 redirect papunta doon. Habang inililipat,
+# read-only ang school sa source shard (503 sa writes) hanggang maisulat ang pin.
+DEFAULT_SCHOOL = "default"
+SHARD_VNODES = 64
+
+USER_SCHOOL = {}     # username -> school_id
+SCHOOL_USERS = {}    # school_id -> set(usernames)
+
+
+def normalize_school(name):
+    slug = re.sub(r"[^a-z0-9]+", "-", (name or "").strip().lower()).strip("-")
+    return slug or DEFAULT_SCHOOL
+
+
+def set_user_school(user, school):
+    old = USER_SCHOOL.get(user)
+    if old is not None:
+        SCHOOL_USERS.get(old, set()).discard(user)
+    USER_SCHOOL[user] = school
+    SCHOOL_USERS.setdefault(school, set()).add(user)
+
+
+def _ring_hash(key):
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class ShardRing:
+    """Consistent-hash ring; adding a shard only moves ~1/N of the schools."""
+
+    def __init__(self, shard_names, vnodes=SHARD_VNODES):
+        self._ring = sorted(
+            (_ring_hash(f"{name}#{i}"), name)
+            for name in shard_names
+            for i in range(vnodes)
+        )
+        self._keys = [h for h, _ in self._ring]
+
+    def lookup(self, school):
+        if not self._ring:
+            return None
+        i = bisect.bisect(self._keys, _ring_hash(school)) % len(self._ring)
+        return self._ring[i][1]
+
+
+def _parse_shards(spec):
+    shards = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, url = part.split("=", 1)
+            shards[name.strip()] = url.strip().rstrip("/")
+    return shards
+
+
+SHARDS = _parse_shards(os.environ.get("UNIVERCYCLE_SHARDS"))
+THIS_SHARD = os.environ.get("UNIVERCYCLE_SHARD")
+SHARD_PINS_PATH = os.environ.get("UNIVERCYCLE_SHARD_PINS")
+SHARD_TOKEN = os.environ.get("UNIVERCYCLE_SHARD_TOKEN")
+SHARD_RING = ShardRing(sorted(SHARDS))
+_PINS_CACHE = {"mtime": None, "pins": {}}
+FREEZE_DRAIN_TIMEOUT = 30   # seconds na hihintayin ang writes na tumatakbo pa
+
+FROZEN_SCHOOLS = set()      # schools na inililipat: read-only sa shard na ito
+TENANT_WRITES = {}          # school -> bilang ng write requests na tumatakbo
+_TENANT_COND = threading.Condition()
+
+
+def load_shard_pins():
+    """Re-read the pins file only when it changes."""
+    if not SHARD_PINS_PATH or not os.path.exists(SHARD_PINS_PATH):
+        return {}
+    mtime = os.path.getmtime(SHARD_PINS_PATH)
+    if _PINS_CACHE["mtime"] != mtime:
+        with open(SHARD_PINS_PATH, encoding="utf-8") as fh:
+            _PINS_CACHE["pins"] = json.load(fh)
+        _PINS_CACHE["mtime"] = mtime
+    return _PINS_CACHE["pins"]
+
+
+def shard_for(school):
+    return load_shard_pins().get(school) or SHARD_RING.lookup(school)
+
+
+def foreign_shard_url(school):
+    """Base URL ng ibang shard kung doon ang school, else None."""
+    if not SHARDS or not THIS_SHARD:
+        return None
+    owner = shard_for(school)
+    if owner and owner != THIS_SHARD and owner in SHARDS:
+        return SHARDS[owner]
+    return None
+
+
+def begin_tenant_write(school):
+    """Count a write request for school; False kung naka-freeze (inililipat)."""
+    with _TENANT_COND:
+        if school in FROZEN_SCHOOLS:
+            return False
+        TENANT_WRITES[school] = TENANT_WRITES.get(school, 0) + 1
+    g.setdefault("tenant_writes", []).append(school)
+    return True
+
+
+@app.teardown_request
+def end_tenant_writes(exc=None):
+    schools = g.pop("tenant_writes", ())
+    if not schools:
+        return
+    with _TENANT_COND:
+        for school in schools:
+            TENANT_WRITES[school] -= 1
+            if not TENANT_WRITES[school]:
+                del TENANT_WRITES[school]
+        _TENANT_COND.notify_all()
+
+
+def freeze_tenant(school):
+    """Block new writes for school and wait for running ones; False on timeout."""
+    with _TENANT_COND:
+        FROZEN_SCHOOLS.add(school)
+        return _TENANT_COND.wait_for(lambda: school not in TENANT_WRITES, FREEZE_DRAIN_TIMEOUT)
+
+
+def thaw_tenant(school):
+    with _TENANT_COND:
+        FROZEN_SCHOOLS.discard(school)
+
+
+def tenant_frozen_response():
+    resp = make_response("Inililipat pa ang data ng school mo. Subukan ulit maya-maya.", 503)
+    resp.headers["Retry-After"] = "5"
+    return resp
+
+
+@app.before_request
+def route_tenant():
+    school = session.get("school")
+    if not school or request.endpoint in ("static", "service_worker", "logout"):
+        return None
+    if request.path.startswith("/admin/"):
+        return None
+    base = foreign_shard_url(school)
+    if base:
+        return redirect(base + request.full_path.rstrip("?"), code=307)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and not begin_tenant_write(school):
+        return tenant_frozen_response()
+    return None
+
+
+# ---- tenant export / import / purge ----
+def _per_user_stores():
+    return (
+        USERS, USER_FULLNAME, PROFILE_PICS, MOOD_LOGS, STUDY_LOGS,
+        HELP_REQUESTS, FRIENDS, FRIEND_REQUESTS, USER_CLASSROOMS,
+        USER_STREAKS, USER_WEEKLY_MINUTES, USER_JOURNAL, PROCESSED_EVENTS,
+        USER_DATA_VERSION, SUMMARY_CACHE, USER_RISK, USER_ROLLUPS,
     )
 
 
+def _per_class_stores():
+    return (
+        CLASSROOMS, CLASS_EMOTIONS, CLASS_HELP, CLASS_ANNOUNCEMENTS,
+        CLASS_PRESENCE, CLASS_WEEKLY_MINUTES, CLASS_WEEKLY_TOTALS, CLASS_WEEKLY_RANKS,
+        SEARCH_INDEX, SEARCH_DOCS, SEARCH_SEQ, CLASS_ALERTS, CLASS_ROLLUPS,
+    )
+
+
+def drop_classroom_data(code):
+    """Remove a classroom from every per-classroom store."""
+    for store in _per_class_stores():
+        store.pop(code, None)
+    for live in HUB_SUBSCRIBERS.pop(code, ()):
+        live.closed = True
+
+
+def tenant_classrooms(school):
+    return [code for code, data in CLASSROOMS.items() if data.get("school", DEFAULT_SCHOOL) == school]
+
+
+def export_tenant(school):
+    """JSON-safe snapshot ng lahat ng data ng isang school."""
+    users = {}
+    for u in sorted(SCHOOL_USERS.get(school, ())):
+        users[u] = {
+            "password": USERS.get(u),
+            "fullname": USER_FULLNAME.get(u, u),
+            "pic": PROFILE_PICS.get(u),
+            "moods": MOOD_LOGS.get(u, {}),
+            "study": [r.as_dict() for r in STUDY_LOGS.get(u, [])],
+            "rollups": USER_ROLLUPS.get(u, {}),
+            "help_requests": HELP_REQUESTS.get(u, []),
+            "friends": FRIENDS.get(u, []),
+            "friend_requests": FRIEND_REQUESTS.get(u, []),
+        }
+    classrooms = {}
+    for code in tenant_classrooms(school):
+        data = CLASSROOMS[code]
+        classrooms[code] = {
+            "name": data["name"],
+            "owner": data["owner"],
+            "members": sorted(class_members(code)),
+            "emotions": CLASS_EMOTIONS.get(code, {}),
+            "help": [dict(h.as_dict(), seen_by=list(h.seen_by)) for h in CLASS_HELP.get(code, [])],
+            "announcements": [a.as_dict() for a in CLASS_ANNOUNCEMENTS.get(code, [])],
+            "rollups": CLASS_ROLLUPS.get(code, {}),
+        }
+    return {"school": school, "users": users, "classrooms": classrooms}
+
+
+def tenant_conflicts(payload):
+    """Usernames / classroom codes sa payload na pag-aari na ng ibang school dito."""
+    school = payload["school"]
+    users = [u for u in payload["users"] if u in USERS and USER_SCHOOL.get(u, DEFAULT_SCHOOL) != school]
+    codes = [
+        code for code in payload["classrooms"]
+        if code in CLASSROOMS and CLASSROOMS[code].get("school", DEFAULT_SCHOOL) != school
+    ]
+    return {"users": sorted(users), "classrooms": sorted(codes)}
+
+
+def _drop_previous_import(payload):
+    """
+    Re-import (hal. inulit na move): alisin muna ang dating kopya ng mga
+    users / classrooms sa payload, kasama ang weekly totals at presence
+    counts nila, para hindi madoble pag na-track ulit ang study logs.
+    """
+    for code in payload["classrooms"]:
+        if code not in CLASSROOMS:
+            continue
+        for m in class_members(code):
+            presence_leave(m, code)
+        drop_classroom_data(code)
+    for u in payload["users"]:
+        if u not in USERS:
+            continue
+        for code in list(USER_CLASSROOMS.get(u, [])):
+            with locked(users=(u,), classrooms=(code,)):
+                if presence_leave(u, code):
+                    leaderboard_leave(u, code)
+                data = CLASSROOMS.get(code)
+                if data:
+                    data["members"].discard(u)
+        for store in _per_user_stores():
+            store.pop(u, None)
+
+
+def import_tenant(payload):
+    """Load an export_tenant() snapshot and rebuild derived indexes."""
+    school = payload["school"]
+    _drop_previous_import(payload)
+    for u, info in payload["users"].items():
+        USERS[u] = info["password"]
+        USER_FULLNAME[u] = info["fullname"]
+        if info.get("pic"):
+            PROFILE_PICS[u] = info["pic"]
+        MOOD_LOGS[u] = dict(info.get("moods", {}))
+        STUDY_LOGS[u] = []
+        USER_CLASSROOMS[u] = []
+        for r in info.get("study", []):
+            record = StudyRecord(r["date"], r["minutes"], r.get("rest_seconds", 0))
+            STUDY_LOGS[u].append(record)
+            track_study(u, record.date, record.minutes)
+        rebuild_streak(u)
+        if info.get("rollups"):
+            USER_ROLLUPS[u] = info["rollups"]
+        HELP_REQUESTS[u] = list(info.get("help_requests", []))
+        FRIENDS[u] = list(info.get("friends", []))
+        if info.get("friend_requests"):
+            FRIEND_REQUESTS[u] = list(info["friend_requests"])
+        set_user_school(u, school)
+        bump_data_version(u)
+        mark_risk_dirty(u)
+
+    for code, info in payload["classrooms"].items():
+        CLASSROOMS[code] = {
+            "name": info["name"],
+            "owner": info["owner"],
+            "members": set(info["members"]),
+            "school": school,
+        }
+        CLASS_EMOTIONS[code] = dict(info.get("emotions", {}))
+        CLASS_HELP[code] = [
+            HelpMessage(h["message"], h["date"], h.get("time", ""), seen_by=h.get("seen_by", []))
+            for h in info.get("help", [])
+        ]
+        CLASS_ANNOUNCEMENTS[code] = [
+            Announcement(a["sender"], a["message"], a["date"]) for a in info.get("announcements", [])
+        ]
+        if info.get("rollups"):
+            CLASS_ROLLUPS[code] = info["rollups"]
+        for m in info["members"]:
+            if m in USERS and presence_join(m, code):
+                leaderboard_join(m, code)
+        rebuild_search_index(code)
+
+    return {"users": len(payload["users"]), "classrooms": len(payload["classrooms"])}
+
+
+def purge_tenant(school):
+    """Burahin ang data ng school sa shard na ito (after a move)."""
+    users = list(SCHOOL_USERS.pop(school, ()))
+    codes = tenant_classrooms(school)
+    for code in codes:
+        drop_classroom_data(code)
+    for u in users:
+        set_presence(u, "offline")
+        for store in _per_user_stores():
+            store.pop(u, None)
+        USER_SCHOOL.pop(u, None)
+    return {"users": len(users), "classrooms": len(codes)}
+
+
+def _require_shard_token():
+    """Admin endpoints: 404 kung walang token na naka-configure."""
+    if not SHARD_TOKEN:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get("X-Shard-Token", ""), SHARD_TOKEN):
+        abort(403)
+
+
+@app.route("/admin/tenants/<school>", methods=["GET", "DELETE"])
+def admin_tenant(school):
+    _require_shard_token()
+    if request.method == "DELETE":
+        return api_response(purge_tenant(school))
+    return api_response(export_tenant(school))
+
+
+@app.route("/admin/tenants/<school>/freeze", methods=["POST", "DELETE"])
+def admin_tenant_freeze(school):
+    _require_shard_token()
+    if request.method == "DELETE":
+        thaw_tenant(school)
+        return api_response({"school": school, "frozen": False})
+    if not freeze_tenant(school):
+        thaw_tenant(school)
+        return api_error("Timed out waiting for running writes; not frozen.", 503)
+    return api_response({"school": school, "frozen": True})
+
+
+@app.route("/admin/tenants", methods=["POST"])
+def admin_tenant_import():
+    _require_shard_token()
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or "school" not in payload:
+        return api_error("Expected an export_tenant() JSON body.", 400)
+    # walang ino-overwrite: buo ang import o wala
+    conflicts = tenant_conflicts(payload)
+    if conflicts["users"] or conflicts["classrooms"]:
+        return api_response({"error": "Already used by another school on this shard.", **conflicts}, status=409)
+    return api_response(import_tenant(payload), status=201)
+
+
+def _shard_request(method, url, payload=None):
+    body = _dumps(payload) if payload is not None else None
+    req = urllib.request.Request(url, data=body, method=method, headers={
+        "X-Shard-Token": SHARD_TOKEN or "",
+        "Content-Type": "application/json",
+    })
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        return json.loads(resp.read() or b"{}")
+
+
+@app.cli.command("move-tenant")
+@click.argument("school")
+@click.argument("target")
+def move_tenant_command(school, target):
+    """Move SCHOOL's data to shard TARGET and pin it there."""
+    if target not in SHARDS:
+        raise click.ClickException(f"Unknown shard {target!r}; known: {', '.join(SHARDS) or 'none'}")
+    if not SHARD_PINS_PATH:
+        raise click.ClickException("Set UNIVERCYCLE_SHARD_PINS so every shard sees the new placement.")
+    school = normalize_school(school)
+    source = shard_for(school)
+    if source == target:
+        click.echo(f"{school} is already on {target}.")
+        return
+
+    started = time.perf_counter()
+    freeze_url = f"{SHARDS[source]}/admin/tenants/{school}/freeze"
+    # read-only muna sa source para walang write na mawawala sa pagitan ng
+    # export at ng pin; pagkatapos ng pin, sa target na ang lahat ng requests
+    _shard_request("POST", freeze_url)
+    try:
+        snapshot = _shard_request("GET", f"{SHARDS[source]}/admin/tenants/{school}")
+        try:
+            imported = _shard_request("POST", f"{SHARDS[target]}/admin/tenants", snapshot)
+        except urllib.error.HTTPError as e:
+            if e.code != 409:
+                raise
+            conflicts = json.loads(e.read() or b"{}")
+            raise click.ClickException(
+                f"{target} already has users {conflicts.get('users')} / classrooms "
+                f"{conflicts.get('classrooms')} from another school; nothing was moved."
+            )
+
+        pins = dict(load_shard_pins())
+        pins[school] = target
+        tmp_path = SHARD_PINS_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(pins, fh, indent=2, sort_keys=True)
+        os.replace(tmp_path, SHARD_PINS_PATH)
+
+        _shard_request("DELETE", f"{SHARDS[source]}/admin/tenants/{school}")
+    finally:
+        _shard_request("DELETE", freeze_url)
+    click.echo(
+        f"Moved {school}: {imported['users']} users, {imported['classrooms']} classrooms "
+        f"{source} -> {target} in {time.perf_counter() - started:.2f}s"
+    )
+
+
+# -------------------------
+# RETENTION + COMPACTION
+# -------------------------
+# Raw entries na mas luma sa RETENTION_DAYS ay nire-rollup into weekly
+# aggregates (USER_ROLLUPS / CLASS_ROLLUPS) tapos binubura, para hindi
+# lumaki nang walang hanggan ang STUDY_LOGS, MOOD_LOGS, CLASS_HELP at
+# CLASS_ANNOUNCEMENTS. Incremental: maliit na batch per lock, may pahinga
+# sa pagitan para hindi maantala ang requests. Minimum 14 days kasi yun ang
+# window ng summary at ng at-risk job.
+RETENTION_DAYS = max(14, int(os.environ.get("UNIVERCYCLE_RETENTION_DAYS", "90")))
+COMPACT_INTERVAL = 3600   # seconds between checks (isang full pass per araw)
+COMPACT_BATCH = 200       # users / classrooms per batch
+COMPACT_PAUSE = 0.01      # seconds between batches
+
+USER_ROLLUPS = {}   # username -> {week_key: {"minutes", "rest_seconds", "sessions", "mood_days", "negative_moods"}}
+CLASS_ROLLUPS = {}  # code -> {week_key: {"help": n, "announcements": n}}
+COMPACT_STATE = {"day": None}
+COMPACT_STATS = {}  # last pass: counts + approx bytes reclaimed
+USER_ROLLUP_FIELDS = ("minutes", "rest_seconds", "sessions", "mood_days", "negative_moods")
+CLASS_ROLLUP_FIELDS = ("help", "announcements")
+
+
+def _rollup_bucket(store, key, day, fields):
+    weeks = store.setdefault(key, {})
+    return weeks.setdefault(week_key(day_to_iso(day)), dict.fromkeys(fields, 0))
+
+
+def compact_user(user, cutoff):
+    """Roll up one user's entries older than cutoff (a day ordinal)."""
+    removed = reclaimed = 0
+    with locked(users=(user,)):
+        logs = STUDY_LOGS.get(user)
+        if logs and any(r.day < cutoff for r in logs):
+            keep = []
+            for r in logs:
+                if r.day >= cutoff:
+                    keep.append(r)
+                    continue
+                bucket = _rollup_bucket(USER_ROLLUPS, user, r.day, USER_ROLLUP_FIELDS)
+                bucket["minutes"] += r.minutes
+                bucket["rest_seconds"] += r.rest_seconds
+                bucket["sessions"] += 1
+                reclaimed += sys.getsizeof(r)
+            removed += len(logs) - len(keep)
+            STUDY_LOGS[user] = keep
+
+        moods = MOOD_LOGS.get(user)
+        if moods:
+            cutoff_iso = day_to_iso(cutoff)
+            for d in [d for d in moods if d < cutoff_iso]:
+                text = moods.pop(d)
+                bucket = _rollup_bucket(USER_ROLLUPS, user, iso_to_day(d), USER_ROLLUP_FIELDS)
+                bucket["mood_days"] += 1
+                bucket["negative_moods"] += is_negative_mood(text)
+                reclaimed += sys.getsizeof(d) + sys.getsizeof(text)
+                removed += 1
+
+        # weekly totals ng lumang linggo: nasa USER_ROLLUPS na ang minutes nila
+        cutoff_week = week_key(day_to_iso(cutoff))
+        weekly = USER_WEEKLY_MINUTES.get(user, {})
+        for wk in [wk for wk in weekly if wk < cutoff_week]:
+            del weekly[wk]
+            reclaimed += sys.getsizeof(wk)
+
+        if removed:
+            bump_data_version(user)
+    return removed, reclaimed
+
+
+def compact_classroom(code, cutoff):
+    """Roll up one classroom's help/announcements older than cutoff."""
+    removed = reclaimed = 0
+    with locked(classrooms=(code,)):
+        for store, field in ((CLASS_HELP, "help"), (CLASS_ANNOUNCEMENTS, "announcements")):
+            entries = store.get(code)
+            if not entries or not any(e.day < cutoff for e in entries):
+                continue
+            keep = []
+            for e in entries:
+                if e.day >= cutoff:
+                    keep.append(e)
+                    continue
+                _rollup_bucket(CLASS_ROLLUPS, code, e.day, CLASS_ROLLUP_FIELDS)[field] += 1
+                reclaimed += sys.getsizeof(e) + sys.getsizeof(e.message)
+            removed += len(entries) - len(keep)
+            store[code] = keep
+
+        # per-member detail ng lumang linggo: hindi na kailangan ng leaderboard
+        cutoff_week = week_key(day_to_iso(cutoff))
+        weeks = CLASS_WEEKLY_MINUTES.get(code, {})
+        ranks = CLASS_WEEKLY_RANKS.get(code, {})
+        for wk in [wk for wk in weeks if wk < cutoff_week]:
+            reclaimed += sys.getsizeof(weeks.pop(wk)) + sys.getsizeof(ranks.pop(wk, None))
+
+        if removed:
+            old_docs = [
+                doc_id for doc_id, (_, entry, _) in SEARCH_DOCS.get(code, {}).items()
+                if entry.day < cutoff
+            ]
+            unindex_messages(code, old_docs)
+    return removed, reclaimed
+
+
+def _in_batches(keys, size):
+    for i in range(0, len(keys), size):
+        yield keys[i:i + size]
+
+
+def run_compaction(force=False):
+    """One full incremental pass; returns (and stores) the stats."""
+    day = today()
+    if COMPACT_STATE["day"] == day and not force:
+        return COMPACT_STATS
+    started = time.perf_counter()
+    cutoff = iso_to_day(day) - RETENTION_DAYS
+    stats = {"cutoff": day_to_iso(cutoff), "entries": 0, "approx_bytes": 0, "users": 0, "classrooms": 0}
+
+    for batch in _in_batches(list(set(STUDY_LOGS) | set(MOOD_LOGS)), COMPACT_BATCH):
+        for user in batch:
+            removed, reclaimed = compact_user(user, cutoff)
+            if removed:
+                stats["users"] += 1
+                stats["entries"] += removed
+                stats["approx_bytes"] += reclaimed
+        time.sleep(COMPACT_PAUSE)
+
+    codes = list(set(CLASS_HELP) | set(CLASS_ANNOUNCEMENTS) | set(CLASS_WEEKLY_MINUTES))
+    for batch in _in_batches(codes, COMPACT_BATCH):
+        for code in batch:
+            removed, reclaimed = compact_classroom(code, cutoff)
+            if removed:
+                stats["classrooms"] += 1
+                stats["entries"] += removed
+            stats["approx_bytes"] += reclaimed
+        time.sleep(COMPACT_PAUSE)
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    COMPACT_STATE["day"] = day
+    COMPACT_STATS.clear()
+    COMPACT_STATS.update(stats)
+    app.logger.info(
+        "compaction: %(entries)d entries older than %(cutoff)s rolled up "
+        "(%(users)d users, %(classrooms)d classrooms), ~%(approx_bytes)d bytes reclaimed in %(seconds)ss",
+        stats,
+    )
+    return COMPACT_STATS
+
+
+def _compaction_loop():
+    while True:
+        try:
+            run_compaction()
+        except Exception:
+            app.logger.exception("compaction failed")
+        time.sleep(COMPACT_INTERVAL)
+
+
+@app.cli.command("compact")
+def compact_command():
+    """Run one retention/compaction pass now."""
+    stats = run_compaction(force=True)
+    click.echo(
+        f"Rolled up {stats['entries']} entries older than {stats['cutoff']} "
+        f"(~{stats['approx_bytes'] / 1024:.0f} KiB) in {stats['seconds']}s"
+    )
+
+
+# -------------------------
+# RESPONSE COMPRESSION + HTML MINIFY
+# -------------------------
+# Mabagal ang mobile data sa maraming probinsya, kaya:
+#   1) minify ang rendered HTML (indentation + blank lines lang ang tinatanggal,
+#      sa text sa pagitan ng tags; hindi ginagalaw ang tags mismo / attribute
+#      values, pati ang <pre>, <textarea>, <script>, <style>)
+#   2) gzip / brotli ayon sa Accept-Encoding kapag >= COMPRESS_MIN_SIZE
+#   3) LRU cache ng compressed bodies (key = hash ng body + encoding), para
+#      hindi na ulit i-compress ang parehong page/JSON
+# Hindi kasama: streamed (SSE), direct_passthrough (send_file), non-200.
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_CACHE_SIZE = 256
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_TYPES = {
+    "text/html", "text/css", "text/plain", "text/javascript",
+    "application/javascript", "application/json",
+}
+COMPRESS_CACHE = collections.OrderedDict()  # (digest, encoding) -> bytes
+_COMPRESS_LOCK = threading.Lock()
+
+_RAW_BLOCK_RE = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"(<!--.*?-->|<[^>\"']*(?:(?:\"[^\"]*\"|'[^']*')[^>\"']*)*>)", re.DOTALL)
+_INDENT_RE = re.compile(r"[\r\n]\s*")
+
+
+def _minify_text(html):
+    # tags (kasama ang multi-line attribute values) ay buo; text lang ang ginagalaw
+    parts = _TAG_RE.split(html)
+    parts[::2] = [_INDENT_RE.sub("\n", text) for text in parts[::2]]
+    return "".join(parts)
+
+
+def minify_html(html):
+    """Strip indentation and blank lines between tags, outside raw-text blocks."""
+    parts = _RAW_BLOCK_RE.split(html)
+    out = []
+    # split() with 2 groups: [text, block, tagname, text, block, tagname, ...]
+    for i in range(0, len(parts), 3):
+        out.append(_minify_text(parts[i]))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return "".join(out).strip()
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compressed_body(body, encoding, cacheable=True):
+    if not cacheable:
+        return _compress(body, encoding)
+    key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+    with _COMPRESS_LOCK:
+        hit = COMPRESS_CACHE.get(key)
+        if hit is not None:
+            COMPRESS_CACHE.move_to_end(key)
+            return hit
+    data = _compress(body, encoding)
+    with _COMPRESS_LOCK:
+        COMPRESS_CACHE[key] = data
+        while len(COMPRESS_CACHE) > COMPRESS_CACHE_SIZE:
+            COMPRESS_CACHE.popitem(last=False)
+    return data
+
+
+@app.after_request
+def compress_response(resp):
+    if (
+        resp.status_code != 200
+        or resp.direct_passthrough
+        or resp.is_streamed
+        or "Content-Encoding" in resp.headers
+        or resp.mimetype not in COMPRESSIBLE_TYPES
+    ):
+        return resp
+
+    if resp.mimetype == "text/html":
+        resp.set_data(minify_html(resp.get_data(as_text=True)))
+
+    resp.vary.add("Accept-Encoding")
+    body = resp.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return resp
+
+    offers = ["br", "gzip"] if brotli is not None else ["gzip"]
+    encoding = request.accept_encodings.best_match(offers)
+    if encoding is None:
+        return resp
+
+    cacheable = "no-store" not in resp.headers.get("Cache-Control", "")
+    resp.set_data(compressed_body(body, encoding, cacheable))
+    resp.headers["Content-Encoding"] = encoding
+    # iba na ang bytes, kaya weak na ang ETag (If-None-Match ay weak compare pa rin)
+    etag, weak = resp.get_etag()
+    if etag and not weak:
+        resp.set_etag(etag, weak=True)
+    return resp
+
+
+# -------------------------
+# BULK IMPORT / SEEDING
+# -------------------------
+# Lahat ng CSV ay optional; kung ano lang ang nasa folder, yun ang i-lo-load.
+#   users.csv        username,password,fullname[,photo][,school]
+#   classrooms.csv   code,name,owner  (school = school ng owner)
+#   memberships.csv  username,code
+#   moods.csv        username,date,mood
+#   study.csv        username,date,minutes[,rest_seconds]
+SEED_BATCH_SIZE = 5000
+
+
+def _read_csv_batches(path, batch_size):
+    """Yield lists of row dicts from a CSV file, batch_size rows at a time."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        reader = csv.DictReader(fh)
+        while True:
+            batch = list(itertools.islice(reader, batch_size))
+            if not batch:
+                return
+            yield batch
+
+
+def _cell(row, key):
+    # kulang na cells sa maikling row ay None (csv.DictReader), hindi ""
+    return (row.get(key) or "").strip()
+
+
+def bulk_load(directory, batch_size=SEED_BATCH_SIZE):
+    """
+    Load roster and historical logs from CSV files in `directory`.
+
+    Users and classrooms are inserted batch by batch; memberships are
+    collected first and the reverse indexes (USER_CLASSROOMS and each
+    classroom's members set) are built in a single pass at the end.
+    Rows na kulang / sira ang cells ay nilalaktawan, hindi humihinto ang load.
+    Returns a dict of row counts per file, "skipped" (file -> rows not
+    loaded) and elapsed seconds.
+    """
+    counts = {}
+    skipped = {}
+    started = time.perf_counter()
+
+    def path_of(name):
+        path = os.path.join(directory, name)
+        return path if os.path.exists(path) else None
+
+    # 1) users
+    path = path_of("users.csv")
+    if path:
+        n = 0
+        for batch in _read_csv_batches(path, batch_size):
+            for row in batch:
+                u = _cell(row, "username")
+                password = _cell(row, "password")
+                if not u or not password:
+                    skipped["users"] = skipped.get("users", 0) + 1
+                    continue
+                USERS[u] = password
+                USER_FULLNAME[u] = (_cell(row, "fullname") or u).upper()
+                if _cell(row, "photo"):
+                    PROFILE_PICS[u] = _cell(row, "photo")
+                set_user_school(u, normalize_school(row.get("school")))
+                MOOD_LOGS.setdefault(u, {})
+                STUDY_LOGS.setdefault(u, [])
+                HELP_REQUESTS.setdefault(u, [])
+                FRIENDS.setdefault(u, [])
+                USER_CLASSROOMS.setdefault(u, [])
+                n += 1
+        counts["users"] = n
+
+    # 2) classrooms (owner is automatically a member)
+    pending_members = {}  # code -> list of usernames
+    path = path_of("classrooms.csv")
+    if path:
+        n = 0
+        for batch in _read_csv_batches(path, batch_size):
+            for row in batch:
+                code = _cell(row, "code").upper()
+                owner = _cell(row, "owner")
+                name = _cell(row, "name")
+                if not code or not owner or not name:
+                    skipped["classrooms"] = skipped.get("classrooms", 0) + 1
+                    continue
+                CLASSROOMS.setdefault(code, {
+                    "name": name,
+                    "owner": owner,
+                    "members": set(),
+                    "school": USER_SCHOOL.get(owner, DEFAULT_SCHOOL),
+                })
+                pending_members.setdefault(code, []).append(owner)
+                n += 1
+        counts["classrooms"] = n
+
+    # 3) memberships
+    path = path_of("memberships.csv")
+    if path:
+        n = 0
+        for batch in _read_csv_batches(path, batch_size):
+            for row in batch:
+                code = _cell(row, "code").upper()
+                u = _cell(row, "username")
+                if code not in CLASSROOMS or not u:
+                    skipped["memberships"] = skipped.get("memberships", 0) + 1
+                    continue
+                pending_members.setdefault(code, []).append(u)
+                n += 1
+        counts["memberships"] = n
+
+    # one pass para sa reverse indexes
+    for code, members in pending_members.items():
+        member_set = CLASSROOMS[code]["members"]
+        school = CLASSROOMS[code].get("school", DEFAULT_SCHOOL)
+        for u in members:
+            if u not in USERS or u in member_set or USER_SCHOOL.get(u, DEFAULT_SCHOOL) != school:
+                continue
+            member_set.add(u)
+            presence_join(u, code)
+
+    # 4) historical moods
+    path = path_of("moods.csv")
+    if path:
+        n = 0
+        for batch in _read_csv_batches(path, batch_size):
+            for row in batch:
+                u = _cell(row, "username")
+                mood = _cell(row, "mood")
+                # same rule as study.csv: ISO dates lang, skip ang sira
+                try:
+                    date = datetime.date.fromisoformat(_cell(row, "date")).isoformat()
+                except ValueError:
+                    date = None
+                if u not in USERS or not mood or not date:
+                    skipped["moods"] = skipped.get("moods", 0) + 1
+                    continue
+                MOOD_LOGS.setdefault(u, {})[date] = mood
+                bump_data_version(u)
+                n += 1
+        counts["moods"] = n
+
+    # 5) historical study sessions
+    path = path_of("study.csv")
+    if path:
+        n = 0
+        touched = set()
+        for batch in _read_csv_batches(path, batch_size):
+            for row in batch:
+                u = _cell(row, "username")
+                try:
+                    minutes = int(_cell(row, "minutes"))
+                    rest_seconds = int(_cell(row, "rest_seconds") or 0)
+                    record = StudyRecord(_cell(row, "date"), minutes, rest_seconds)
+                except ValueError:
+                    record = None
+                if u not in USERS or record is None or minutes <= 0:
+                    skipped["study"] = skipped.get("study", 0) + 1
+                    continue
+                STUDY_LOGS.setdefault(u, []).append(record)
+                track_study(u, record.date, minutes)
+                bump_data_version(u)
+                touched.add(u)
+                n += 1
+        # CSV rows ay hindi laging sorted by date, kaya i-recompute ang streaks
+        for u in touched:
+            rebuild_streak(u)
+        counts["study"] = n
+
+    counts["skipped"] = skipped
+    counts["seconds"] = time.perf_counter() - started
+    return counts
+
+
+@app.cli.command("seed")
+@click.argument("directory", type=click.Path(exists=True, file_okay=False))
+@click.option("--batch-size", default=SEED_BATCH_SIZE, show_default=True)
+def seed_command(directory, batch_size):
+    """Bulk-load roster and log CSVs from DIRECTORY and report throughput."""
+    counts = bulk_load(directory, batch_size=batch_size)
+    elapsed = counts.pop("seconds")
+    skipped = counts.pop("skipped")
+    total = sum(counts.values())
+    for name, n in counts.items():
+        click.echo(f"{name:12} {n:>10} rows")
+    for name, n in skipped.items():
+        click.echo(f"{name:12} {n:>10} bad rows skipped")
+    rate = total / elapsed if elapsed else float(total)
+    click.echo(f"Loaded {total} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+
+
+# Para sa deployments: i-seed agad pag-start ng server
+if os.environ.get("UNIVERCYCLE_SEED_DIR"):
+    bulk_load(os.environ["UNIVERCYCLE_SEED_DIR"])
+
+
 # -------------------------
 # RUN
 # -------------------------
@@ -0,0 +1,211 @@
+"""
+WSGI vs ASGI capacity benchmark.
+
+Starts the same app twice on localhost, seeded with the same CSV roster:
+  - WSGI: gunicorn local_app:app  (gthread, 1 worker, --threads 8)
+  - ASGI: uvicorn  local_app:asgi_app
+then measures
+  1) how many concurrent SSE presence streams each serves before a 5s timeout
+  2) read throughput (dashboard, summary, classroom feelings + analytics)
+     with and without 100 open streams hogging the server.
+
+    pip install -r requirements.txt -r requirements-optional.txt
+    python bench_asgi.py [--streams 500] [--clients 50] [--seconds 5]
+"""
+import argparse
+import asyncio
+import csv
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import app as univercycle
+from local_app import HERE
+
+app = univercycle.app
+
+CLASS_CODE = "BENCH1"
+STUDENTS = 40
+WSGI_THREADS = 8
+BUSY_STREAMS = 100   # bukas na streams habang sinusukat ang reads*
+
+
+def write_seed(directory):
+    """Class Rep + STUDENTS students in one classroom, with moods + study."""
+    today = univercycle.today_date()
+    students = [f"student{i}" for i in range(STUDENTS)]
+    rows = {
+        "users.csv": [("username", "password", "fullname")]
+        + [("rep", "pw", "Class Rep")]
+        + [(u, "pw", u) for u in students],
+        "classrooms.csv": [("code", "name", "owner"), (CLASS_CODE, "Bench", "rep")],
+        "memberships.csv": [("code", "username")] + [(CLASS_CODE, u) for u in students],
+        "moods.csv": [("username", "date", "mood")] + [
+            (u, (today - univercycle.datetime.timedelta(days=d)).isoformat(), "tired")
+            for u in ["rep"] + students for d in range(7)
+        ],
+        "study.csv": [("username", "date", "minutes")] + [
+            (u, (today - univercycle.datetime.timedelta(days=d)).isoformat(), 30)
+            for u in ["rep"] + students for d in range(14)
+        ],
+    }
+    for name, data in rows.items():
+        with open(os.path.join(directory, name), "w", newline="", encoding="utf-8") as fh:
+            csv.writer(fh).writerows(data)
+
+
+def start_servers(seed_dir, wsgi_port, asgi_port):
+    env = dict(os.environ, UNIVERCYCLE_SEED_DIR=seed_dir)
+    wsgi = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "local_app:app", "-k", "gthread",
+         "-w", "1", "--threads", str(WSGI_THREADS), "-b", f"127.0.0.1:{wsgi_port}",
+         "--log-level", "warning"],
+        cwd=HERE, env=env,
+    )
+    asgi = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "local_app:asgi_app",
+         "--port", str(asgi_port), "--log-level", "warning"],
+        cwd=HERE, env=env,
+    )
+    return [wsgi, asgi]
+
+
+async def wait_ready(client, base):
+    for _ in range(100):
+        try:
+            await client.get(base + "/")
+            return
+        except Exception:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{base} did not start")
+
+
+async def open_stream(client, url, cookies, hold=None):
+    """True kapag nakatanggap ng presence frame; hold = keep it open until set."""
+    try:
+        async with client.stream("GET", url, cookies=cookies) as resp:
+            async for chunk in resp.aiter_bytes():
+                if b"presence" in chunk:
+                    if hold is not None:
+                        await hold.wait()
+                    return True
+    except Exception:
+        return False
+    return False
+
+
+async def stream_capacity(client, base, cookies, n):
+    url = f"{base}/classroom/{CLASS_CODE}/presence/stream"
+    started = time.perf_counter()
+    results = await asyncio.gather(*(open_stream(client, url, cookies) for _ in range(n)))
+    return sum(results), time.perf_counter() - started
+
+
+async def read_load(client, base, cookies, clients, seconds):
+    paths = ["/dashboard", "/summary", f"/classroom/{CLASS_CODE}/feelings",
+             f"/classroom/{CLASS_CODE}/analytics"]
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(i):
+        nonlocal errors
+        n = i
+        while time.perf_counter() < deadline:
+            path = paths[n % len(paths)]
+            n += 1
+            t = time.perf_counter()
+            try:
+                resp = await client.get(base + path, cookies=cookies)
+                if resp.status_code != 200:
+                    errors += 1
+                    continue
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - t)
+
+    await asyncio.gather(*(worker(i) for i in range(clients)))
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else float("nan")
+    median = statistics.median(latencies) * 1000 if latencies else float("nan")
+    return len(latencies) / seconds, median, p95, errors
+
+
+MODES = {
+    f"WSGI (gunicorn gthread x{WSGI_THREADS})": "wsgi_port",
+    "ASGI (uvicorn)": "asgi_port",
+}
+
+
+async def run_phase(args, phase):
+    """One phase against already-started servers; returns {mode: result}."""
+    import httpx
+
+    serializer = app.session_interface.get_signing_serializer(app)
+    cookies = {app.config["SESSION_COOKIE_NAME"]: serializer.dumps({"user": "rep"})}
+    limits = httpx.Limits(max_connections=max(args.streams, BUSY_STREAMS) + args.clients + 20,
+                          max_keepalive_connections=args.clients)
+    results = {}
+    async with httpx.AsyncClient(timeout=5, limits=limits) as client:
+        for name, port_arg in MODES.items():
+            base = f"http://127.0.0.1:{getattr(args, port_arg)}"
+            await wait_ready(client, base)
+            await read_load(client, base, cookies, args.clients, 1)  # warm-up
+            if phase == "streams":
+                results[name] = await stream_capacity(client, base, cookies, args.streams)
+            elif phase == "reads":
+                results[name] = await read_load(client, base, cookies, args.clients, args.seconds)
+            else:  # reads habang may BUSY_STREAMS na bukas na streams
+                hold = asyncio.Event()
+                holders = [asyncio.ensure_future(open_stream(
+                    client, f"{base}/classroom/{CLASS_CODE}/presence/stream", cookies, hold))
+                    for _ in range(BUSY_STREAMS)]
+                await asyncio.sleep(1)
+                results[name] = await read_load(client, base, cookies, args.clients, args.seconds)
+                hold.set()
+                for h in holders:
+                    h.cancel()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--streams", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--wsgi-port", type=int, default=8401)
+    parser.add_argument("--asgi-port", type=int, default=8402)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as seed_dir:
+        write_seed(seed_dir)
+        # bagong servers bawat phase: sa WSGI, hawak pa rin ng naiwang streams
+        # ang threads hanggang sa susunod na keepalive write
+        for phase in ("streams", "reads", "reads_busy"):
+            procs = start_servers(seed_dir, args.wsgi_port, args.asgi_port)
+            try:
+                results[phase] = asyncio.run(run_phase(args, phase))
+            finally:
+                for proc in procs:
+                    proc.terminate()
+                for proc in procs:
+                    proc.wait()
+
+    print(f"{'mode':32} {'streams':>12} {'reads/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'reads/s*':>9} {'p95 ms*':>8}")
+    for name in MODES:
+        served, _ = results["streams"][name]
+        rps, p50, p95, _ = results["reads"][name]
+        rps_busy, _, p95_busy, _ = results["reads_busy"][name]
+        print(f"{name:32} {served:>5}/{args.streams:<6} {rps:>9.0f} {p50:>8.1f} {p95:>8.1f} "
+              f"{rps_busy:>9.0f} {p95_busy:>8.1f}")
+    print(f"* = while {BUSY_STREAMS} other clients keep a presence stream open")
+
+
+if __name__ == "__main__":
+    main()
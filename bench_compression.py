@@ -0,0 +1,117 @@
+"""
+Bytes + CPU per request ng compression middleware.
+
+In-process (Flask test client), isang classroom na may 40 students:
+dashboard, summary at classroom feelings, sinusukat
+  - raw        walang compress_response (bago ang minify + compression)
+  - minified   minify lang (client na walang Accept-Encoding)
+  - gzip / br  cache hit (parehong page ulit) at cache miss (bagong body)
+CPU = time.process_time() per request, kasama ang buong Flask request.
+
+    pip install -r requirements.txt -r requirements-optional.txt
+    python bench_compression.py [--requests 300]
+"""
+import argparse
+import time
+
+import app as univercycle
+import local_app  # noqa: F401  (template loader)
+
+app = univercycle.app
+CLASS_CODE = "BENCH1"
+STUDENTS = 40
+EMOTIONS = ["Happy", "Tired", "Stressed", "Motivated"]
+
+
+def seed():
+    """Class Rep + STUDENTS students: emotions, help messages, 7 days of logs."""
+    students = [f"student{i}" for i in range(STUDENTS)]
+    for u in ["rep"] + students:
+        univercycle.USERS[u] = "pw"
+        univercycle.USER_FULLNAME[u] = u.upper()
+        for store, empty in ((univercycle.MOOD_LOGS, dict), (univercycle.STUDY_LOGS, list),
+                             (univercycle.HELP_REQUESTS, list), (univercycle.FRIENDS, list),
+                             (univercycle.USER_CLASSROOMS, list)):
+            store[u] = empty()
+    univercycle.CLASSROOMS[CLASS_CODE] = {
+        "name": "Bench", "owner": "rep", "members": {"rep"}, "school": univercycle.DEFAULT_SCHOOL,
+    }
+    univercycle.presence_join("rep", CLASS_CODE)
+    for i, u in enumerate(students):
+        univercycle.CLASSROOMS[CLASS_CODE]["members"].add(u)
+        univercycle.presence_join(u, CLASS_CODE)
+        univercycle.save_class_emotion(CLASS_CODE, u, EMOTIONS[i % len(EMOTIONS)])
+        for d in univercycle.last_7_days():
+            univercycle.add_study_record(u, univercycle.StudyRecord(d, 30, 300))
+            univercycle.save_mood(u, "okay lang", d)
+    for i in range(20):
+        univercycle.post_class_help(CLASS_CODE, students[i], f"Paano po yung number {i} sa assignment?")
+
+
+PAGES = {
+    "dashboard": ("student0", "student", "/dashboard"),
+    "summary": ("student0", "student", "/summary"),
+    "classroom_feelings": ("rep", "classrep", f"/classroom/{CLASS_CODE}/feelings"),
+}
+
+
+def client_for(user, role):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["user"] = user
+        sess["study_mode"] = "school"
+        sess["role"] = role
+    return client
+
+
+def measure(client, path, encoding, n, cold=False):
+    """(bytes, CPU ms per request); cold = walang laman ang compressed cache."""
+    headers = {"Accept-Encoding": encoding} if encoding else {}
+    resp = client.get(path, headers=headers)
+    assert resp.status_code == 200, (path, resp.status_code)
+    assert resp.headers.get("Content-Encoding") == encoding, resp.headers
+    started = time.process_time()
+    for _ in range(n):
+        if cold:
+            univercycle.COMPRESS_CACHE.clear()
+        client.get(path, headers=headers)
+    return len(resp.data), (time.process_time() - started) / n * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    seed()
+
+    encodings = ["gzip"] + (["br"] if univercycle.brotli is not None else [])
+    header = f"{'page':20} {'raw B':>7} {'min B':>7}" + "".join(f" {e + ' B':>7}" for e in encodings)
+    header += f" {'raw ms':>7} {'min ms':>7}" + "".join(
+        f" {e + ' hit':>8} {e + ' miss':>8}" for e in encodings)
+    print(header)
+
+    hook = univercycle.compress_response
+    for name, (user, role, path) in PAGES.items():
+        client = client_for(user, role)
+        app.after_request_funcs[None].remove(hook)
+        try:
+            raw_bytes, raw_ms = measure(client, path, None, args.requests)
+        finally:
+            app.after_request_funcs[None].append(hook)
+        min_bytes, min_ms = measure(client, path, None, args.requests)
+
+        sizes, cpu = [], []
+        for encoding in encodings:
+            size, hit_ms = measure(client, path, encoding, args.requests)
+            _, miss_ms = measure(client, path, encoding, args.requests, cold=True)
+            sizes.append(size)
+            cpu += [hit_ms, miss_ms]
+        row = f"{name:20} {raw_bytes:>7} {min_bytes:>7}" + "".join(f" {s:>7}" for s in sizes)
+        row += f" {raw_ms:>7.2f} {min_ms:>7.2f}" + "".join(f" {ms:>8.2f}" for ms in cpu)
+        print(row)
+
+    print("CPU = ms per request (process_time), buong Flask request kasama")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Memory benchmark para sa study / help / announcement records.
+
+Gumagawa ng N entries (default 1M) bawat isa, una bilang lumang dict shape
+(ISO date string per entry), tapos bilang StudyRecord / HelpMessage /
+Announcement, at sinusukat ng tracemalloc ang bytes per record.
+
+    python bench_memory.py [--records 1000000]
+"""
+import argparse
+import datetime
+import tracemalloc
+
+import app as univercycle
+
+START = datetime.date(2026, 1, 1)
+SENDER = "Class Rep"   # USER_FULLNAME value, shared ng lahat ng announcements niya
+
+
+def fresh_date(i):
+    # bagong string bawat entry, gaya ng today() / isoformat() sa app
+    return (START + datetime.timedelta(days=i % 365)).isoformat()
+
+
+def fresh_time(i):
+    return f"{i % 12 + 1:02d}:{i % 60:02d} PM"
+
+
+SHAPES = {
+    "study": (
+        lambda i: {"date": fresh_date(i), "minutes": 25, "rest_seconds": 300},
+        lambda i: univercycle.StudyRecord(fresh_date(i), 25, 300),
+    ),
+    "help": (
+        lambda i: {"message": "m", "date": fresh_date(i), "time": fresh_time(i), "seen_by": ["u1"]},
+        lambda i: univercycle.HelpMessage("m", fresh_date(i), fresh_time(i), seen_by=["u1"]),
+    ),
+    "announcement": (
+        lambda i: {"sender": SENDER, "message": "m", "date": fresh_date(i)},
+        lambda i: univercycle.Announcement(SENDER, "m", fresh_date(i)),
+    ),
+}
+
+
+def bytes_per_record(make, n):
+    tracemalloc.start()
+    records = [make(i) for i in range(n)]
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return current / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'record':14} {'dict B':>8} {'slots B':>8} {'saved':>7}")
+    for name, (as_dict, as_record) in SHAPES.items():
+        before = bytes_per_record(as_dict, args.records)
+        after = bytes_per_record(as_record, args.records)
+        print(f"{name:14} {before:>8.0f} {after:>8.0f} {1 - after / before:>7.0%}")
+    print(f"bytes per record over {args.records:,} entries (tracemalloc, includes the list slot)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+import local_app  # noqa: F401  (template loader para sa lahat ng tests)
@@ -0,0 +1,22 @@
+"""
+app.py na may template loader para sa checkout na ito.
+
+Katabi ng app.py ang templates (walang templates/ folder), kaya
+FileSystemLoader ng folder na ito ang gamit kapag wala yun. Ginagamit ng
+tests (conftest.py), ng benchmarks at ng shard processes ng test_sharding:
+
+    flask --app local_app run
+    uvicorn local_app:asgi_app
+"""
+import os
+
+from jinja2 import FileSystemLoader
+
+import app as univercycle
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+if not os.path.isdir(os.path.join(HERE, "templates")):
+    univercycle.app.jinja_loader = FileSystemLoader(HERE)
+
+app = univercycle.app
+asgi_app = univercycle.asgi_app
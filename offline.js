@@ -0,0 +1,245 @@
+/* ============================
+   OFFLINE QUEUE + DELTA SYNC
+   Kapag walang internet, naka-save muna sa localStorage ang
+   mood / study session / classroom emotion, tapos isang
+   request lang ang sync pagbalik ng connection.
+   Per user ang lahat ng keys (shared computers sa school), at
+   binubura ang cached pages + recent data pag nag-logout / nagpalit.
+============================ */
+(function () {
+    const script = document.currentScript;
+    const SW_URL = script.dataset.sw;
+    const SYNC_URL = script.dataset.sync;
+    const USER = script.dataset.user || "";
+    const OWNER_KEY = "univercycle.owner";
+    const QUEUE_KEY = "univercycle.queue." + USER;
+    const CURSOR_KEY = "univercycle.cursor." + USER;
+    const RECENT_KEY = "univercycle.recent." + USER;
+    const RECENT_DAYS = 7;
+    const MAX_SYNC_ENTRIES = 200;   // MAX_BATCH_EVENTS sa app.py (413 kapag lampas)
+
+    function load(key, fallback) {
+        try {
+            return JSON.parse(localStorage.getItem(key)) || fallback;
+        } catch (e) {
+            return fallback;
+        }
+    }
+
+    function loadQueue() {
+        return load(QUEUE_KEY, []);
+    }
+
+    function storeQueue(queue) {
+        localStorage.setItem(QUEUE_KEY, JSON.stringify(queue));
+    }
+
+    // ibang user na (o naka-logout): burahin ang cached pages at recent data
+    // ng dating user. Ang queue niya ay naiiwan para ma-sync pag nag-login ulit.
+    function forgetPreviousUser() {
+        const owner = localStorage.getItem(OWNER_KEY);
+        if (owner === USER) {
+            return;
+        }
+        if (owner) {
+            localStorage.removeItem("univercycle.recent." + owner);
+            localStorage.removeItem("univercycle.cursor." + owner);
+        }
+        if (window.caches) {
+            caches.keys().then(function (keys) {
+                keys.forEach(function (key) {
+                    if (key.indexOf("univercycle-") === 0) {
+                        caches.delete(key);
+                    }
+                });
+            });
+        }
+        if (USER) {
+            localStorage.setItem(OWNER_KEY, USER);
+        } else {
+            localStorage.removeItem(OWNER_KEY);
+        }
+    }
+
+    function newId() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return Date.now().toString(36) + Math.random().toString(36).slice(2);
+    }
+
+    // parehong timezone ng server (PH_TZ sa app.py)
+    function localDate(daysAgo) {
+        const d = new Date(Date.now() - (daysAgo || 0) * 86400000);
+        return d.toLocaleDateString("en-CA", { timeZone: "Asia/Manila" });
+    }
+
+    function add(entry) {
+        entry.id = entry.id || newId();
+        entry.date = entry.date || localDate();
+        const queue = loadQueue();
+        queue.push(entry);
+        storeQueue(queue);
+    }
+
+    // delta galing sa server: mood / study / emotion mula sa ibang device
+    function applyChanges(data) {
+        const recent = data.reset ? {} : load(RECENT_KEY, {});
+        recent.moods = recent.moods || {};
+        recent.minutes = recent.minutes || {};
+        recent.emotions = recent.emotions || {};
+        (data.changes || []).forEach(function (change) {
+            const c = change.data || {};
+            if (change.kind === "mood") {
+                recent.moods[c.date] = c.mood;
+            } else if (change.kind === "study") {
+                recent.minutes[c.date] = (recent.minutes[c.date] || 0) + c.minutes;
+            } else if (change.kind === "emotion") {
+                recent.emotions[c.code] = c;
+            }
+        });
+        const oldest = localDate(RECENT_DAYS - 1);
+        ["moods", "minutes"].forEach(function (kind) {
+            Object.keys(recent[kind]).forEach(function (date) {
+                if (date < oldest) {
+                    delete recent[kind][date];
+                }
+            });
+        });
+        localStorage.setItem(RECENT_KEY, JSON.stringify(recent));
+        renderRecent();
+    }
+
+    // <p data-recent="moods"> / data-recent="minutes": today's synced value
+    function renderRecent() {
+        const recent = load(RECENT_KEY, {});
+        const today = localDate();
+        document.querySelectorAll("[data-recent]").forEach(function (el) {
+            const bucket = recent[el.dataset.recent] || {};
+            const value = bucket[today];
+            el.hidden = value === undefined;
+            if (value !== undefined) {
+                el.querySelector("b").textContent = value;
+            }
+        });
+    }
+
+    function showNotice(text, className) {
+        const card = document.querySelector(".card") || document.body;
+        const note = document.createElement("p");
+        note.className = className;
+        note.textContent = text;
+        card.insertBefore(note, card.firstChild);
+    }
+
+    const KIND_LABELS = { mood: "mood", session: "study session", emotion: "classroom emotion" };
+
+    let syncing = false;
+
+    function sync() {
+        // paisa-isang chunk; ang natira ay isusunod pagkatapos nito
+        const queue = loadQueue().slice(0, MAX_SYNC_ENTRIES);
+        if (syncing || !USER || !navigator.onLine || !SYNC_URL) {
+            return Promise.resolve();
+        }
+
+        const body = {
+            cursor: parseInt(localStorage.getItem(CURSOR_KEY) || "0", 10),
+            moods: [],
+            sessions: [],
+            emotions: []
+        };
+        queue.forEach(function (entry) {
+            const bucket = body[entry.kind + "s"];
+            if (bucket) {
+                bucket.push(entry);
+            }
+        });
+
+        syncing = true;
+        let accepted = false;
+        return fetch(SYNC_URL, {
+            method: "POST",
+            credentials: "same-origin",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify(body)
+        }).then(function (res) {
+            if (!res.ok) {
+                return;   // hal. naka-logout pa; subukan ulit mamaya
+            }
+            return res.json().then(function (data) {
+                const sent = {};
+                queue.forEach(function (entry) { sent[entry.id] = entry; });
+                storeQueue(loadQueue().filter(function (entry) { return !sent[entry.id]; }));
+
+                // hindi tinanggap (hal. lampas 7 days na naka-queue): sabihin sa user
+                const rejected = (data.rejected || []).map(function (id) {
+                    return sent[id];
+                }).filter(Boolean);
+                if (rejected.length) {
+                    showNotice(
+                        "Hindi na-save ang " + rejected.length + " offline entry: " +
+                        rejected.map(function (entry) {
+                            return (KIND_LABELS[entry.kind] || entry.kind) + " (" + entry.date + ")";
+                        }).join(", ") + ". Luma na o hindi na valid.",
+                        "error"
+                    );
+                }
+
+                applyChanges(data);
+                localStorage.setItem(CURSOR_KEY, String(data.cursor));
+                accepted = true;
+            });
+        }).catch(function () {}).then(function () {
+            syncing = false;
+            if (accepted && loadQueue().length) {
+                return sync();   // susunod na chunk
+            }
+        });
+    }
+
+    function showQueued(form) {
+        const note = document.createElement("p");
+        note.className = "success";
+        note.textContent = "Offline ka ngayon — naka-save muna ito at isi-sync pagbalik ng internet.";
+        form.parentNode.insertBefore(note, form.nextSibling);
+    }
+
+    // forms na may data-offline="mood" / "emotion"
+    document.addEventListener("submit", function (event) {
+        const form = event.target;
+        const kind = form.dataset ? form.dataset.offline : null;
+        if (!kind || !USER || navigator.onLine) {
+            return;
+        }
+        event.preventDefault();
+
+        if (kind === "mood") {
+            add({ kind: "mood", mood: form.elements.mood.value });
+        } else if (kind === "emotion") {
+            add({
+                kind: "emotion",
+                code: form.dataset.code,
+                emotion: event.submitter ? event.submitter.value : ""
+            });
+        }
+        showQueued(form);
+    });
+
+    window.UniverQueue = {
+        add: add,
+        sync: sync,
+        size: function () { return loadQueue().length; }
+    };
+
+    forgetPreviousUser();
+    renderRecent();
+    window.addEventListener("online", sync);
+    if ("serviceWorker" in navigator && SW_URL) {
+        navigator.serviceWorker.register(SW_URL);
+    }
+    // hindi bawat page view: kapag may naka-queue lang, o may recent data na ipapakita
+    if (loadQueue().length || document.querySelector("[data-recent]")) {
+        sync();
+    }
+})();
@@ -0,0 +1,82 @@
+/* UniverCycle service worker: cached page shells + static files */
+// v2: v1 cached every page (summary, friends, analytics); binubura sa activate
+const SHELL_CACHE = "univercycle-shell-v2";
+const STATIC_PREFIX = "{{ url_for('static', filename='') }}";
+// ito lang ang pages na naka-cache (offline timer + mood). Walang summary,
+// friends o Class Rep pages: private yun at shared ang computers sa school.
+// Binubura ng offline.js ang cache pag nag-logout / nagpalit ng user.
+const SHELL_PAGES = [
+    "{{ url_for('timer') }}",
+    "{{ url_for('mood') }}"
+];
+const SHELL_URLS = [
+    "{{ url_for('static', filename='styles.css') }}",
+    "{{ url_for('static', filename='offline.js') }}"
+].concat(SHELL_PAGES);
+
+self.addEventListener("install", function (event) {
+    event.waitUntil(
+        caches.open(SHELL_CACHE).then(function (cache) {
+            // isa-isa para hindi bumagsak lahat kung may isang hindi ma-fetch
+            return Promise.all(SHELL_URLS.map(function (url) {
+                return cache.add(url).catch(function () {});
+            }));
+        }).then(function () {
+            return self.skipWaiting();
+        })
+    );
+});
+
+self.addEventListener("activate", function (event) {
+    event.waitUntil(
+        caches.keys().then(function (keys) {
+            return Promise.all(keys.filter(function (key) {
+                return key !== SHELL_CACHE;
+            }).map(function (key) {
+                return caches.delete(key);
+            }));
+        }).then(function () {
+            return self.clients.claim();
+        })
+    );
+});
+
+self.addEventListener("fetch", function (event) {
+    const req = event.request;
+    const url = new URL(req.url);
+    if (req.method !== "GET" || url.origin !== self.location.origin) {
+        return;
+    }
+
+    // static files: cache-first
+    if (url.pathname.startsWith(STATIC_PREFIX)) {
+        event.respondWith(
+            caches.match(req).then(function (hit) {
+                return hit || fetch(req).then(function (res) {
+                    if (res.ok) {
+                        const copy = res.clone();
+                        caches.open(SHELL_CACHE).then(function (cache) { cache.put(req, copy); });
+                    }
+                    return res;
+                });
+            })
+        );
+        return;
+    }
+
+    // shell pages: network-first, fallback sa cached shell kapag offline.
+    // Lahat ng ibang page ay diretso sa network at hindi kina-cache.
+    if (req.mode === "navigate" && SHELL_PAGES.indexOf(url.pathname) !== -1) {
+        event.respondWith(
+            fetch(req).then(function (res) {
+                if (res.ok && !res.redirected) {
+                    const copy = res.clone();
+                    caches.open(SHELL_CACHE).then(function (cache) { cache.put(req, copy); });
+                }
+                return res;
+            }).catch(function () {
+                return caches.match(req);
+            })
+        );
+    }
+});
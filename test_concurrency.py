@@ -0,0 +1,176 @@
+"""
+Stress test para sa striped locks: 40 threads na sabay-sabay nag-fri-friend,
+nag-join/leave, nagpo-post ng help at nagre-record ng study, tapos sinisilip
+kung buo pa rin ang invariants ng shared dicts.
+
+    python -m pytest -q test_concurrency.py
+"""
+import random
+import sys
+import threading
+
+import app as A
+
+THREADS = 40
+OPS_PER_THREAD = 40
+
+
+def _register(u):
+    A.USERS[u] = "pw"
+    A.USER_FULLNAME[u] = u.upper()
+    A.MOOD_LOGS[u] = {}
+    A.STUDY_LOGS[u] = []
+    A.HELP_REQUESTS[u] = []
+    A.FRIENDS[u] = []
+    A.USER_CLASSROOMS[u] = []
+
+
+def _client(u):
+    c = A.app.test_client()
+    with c.session_transaction() as s:
+        s["user"] = u
+    return c
+
+
+def _hammer(users, code):
+    def worker(u):
+        rng = random.Random(u)
+        c = _client(u)
+        for _ in range(OPS_PER_THREAD):
+            op = rng.random()
+            other = rng.choice(users)
+            if op < 0.15:
+                c.post("/friends", data={"friend": other})
+            elif op < 0.3:
+                c.post(f"/friends/accept/{other}")
+            elif op < 0.45:
+                c.post("/classrooms/manage", data={"action": "join", "code": code})
+            elif op < 0.55 and u != users[0]:
+                c.post(f"/classroom/{code}/leave")
+            elif op < 0.7:
+                c.post(f"/classroom/{code}/help", data={"message": "tulong po"})
+            elif op < 0.85:
+                c.post("/study", data={"minutes": str(rng.randint(1, 30))})
+            else:
+                A.set_presence(u, rng.choice(("studying", "resting", "offline")))
+
+    threads = [threading.Thread(target=worker, args=(u,)) for u in users]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_striped_locks_keep_invariants():
+    old_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # mas madalas na thread switch = mas maraming interleaving
+    try:
+        users = [f"stress{i}" for i in range(THREADS)]
+        for u in users:
+            _register(u)
+        _client(users[0]).post("/classrooms/manage", data={"action": "create", "classname": "Stress"})
+        code = A.USER_CLASSROOMS[users[0]][0]
+
+        _hammer(users, code)
+    finally:
+        sys.setswitchinterval(old_interval)
+
+    # friendships are symmetric and never duplicated
+    for u in users:
+        friends = A.FRIENDS.get(u, [])
+        assert len(friends) == len(set(friends))
+        for f in friends:
+            assert u in A.FRIENDS[f]
+
+    # membership set and reverse index agree
+    members = A.CLASSROOMS[code]["members"]
+    assert members == {u for u in users if code in A.USER_CLASSROOMS[u]}
+    for u in users:
+        assert len(A.USER_CLASSROOMS[u]) == len(set(A.USER_CLASSROOMS[u]))
+
+    # weekly totals = sum of member minutes; ranking = sorted member minutes
+    wk = A.week_key(A.today())
+    weekly = A.CLASS_WEEKLY_MINUTES.get(code, {}).get(wk, {})
+    assert A.CLASS_WEEKLY_TOTALS.get(code, {}).get(wk, 0) == sum(weekly.values())
+    assert A.CLASS_WEEKLY_RANKS.get(code, {}).get(wk, []) == sorted((-m, u) for u, m in weekly.items())
+    for u in users:
+        logged = sum(r.minutes for r in A.STUDY_LOGS[u])
+        assert A.USER_WEEKLY_MINUTES.get(u, {}).get(wk, 0) == logged
+
+    # presence counts match the members' current states
+    expected = {
+        state: sum(1 for u in members if A.USER_STATUS.get(u) == state)
+        for state in A.PRESENCE_STATES
+    }
+    assert A.class_presence(code) == expected
+
+    # seen_by never has duplicates
+    for h in A.CLASS_HELP.get(code, []):
+        assert len(h.seen_by) == len(set(h.seen_by))
+
+
+def test_search_while_posting():
+    _register("searchrep")
+    _client("searchrep").post("/classrooms/manage", data={"action": "create", "classname": "Search"})
+    code = A.USER_CLASSROOMS["searchrep"][0]
+    errors = []
+    done = threading.Event()
+
+    def poster():
+        for i in range(2000):
+            A.post_class_help(code, "searchrep", f"tulong sa algebra quiz {i}")
+        done.set()
+
+    def searcher():
+        try:
+            while not done.is_set():
+                A.search_messages(code, "algebra quiz")
+        except Exception as e:
+            errors.append(e)
+
+    old_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=searcher) for _ in range(4)]
+        threads.append(threading.Thread(target=poster))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(old_interval)
+
+    assert errors == []
+    assert A.search_messages(code, "algebra")["total"] == 2000
+
+
+def test_sync_while_journaling():
+    _register("syncer")
+    errors = []
+    done = threading.Event()
+
+    def writer():
+        for i in range(5000):
+            A.record_change("syncer", "mood", {"date": "2026-10-19", "mood": str(i)})
+        done.set()
+
+    def reader():
+        try:
+            while not done.is_set():
+                A.changes_since("syncer", 0)
+        except Exception as e:
+            errors.append(e)
+
+    old_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        threads.append(threading.Thread(target=writer))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(old_interval)
+
+    assert errors == []
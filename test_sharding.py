@@ -0,0 +1,230 @@
+"""
+Sharding sa dalawang totoong process: routing (307), import conflicts (409),
+freeze habang inililipat (503 sa writes), at `flask move-tenant` na walang
+nawawalang write kahit may nagsusulat habang naglilipat.
+
+    python -m pytest -q test_sharding.py
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import app as A
+from local_app import HERE
+
+app = A.app
+TOKEN = "test-token"
+RING = A.ShardRing(["a", "b"])
+SCHOOL = next(f"school-{i}" for i in range(100) if RING.lookup(f"school-{i}") == "a")
+SCHOOL_B = next(f"school-{i}" for i in range(100) if RING.lookup(f"school-{i}") == "b")
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+_OPENER = urllib.request.build_opener(_NoRedirect)
+
+
+def _call(method, url, data=None, headers=None):
+    """(status, headers, body) kahit 3xx/4xx/5xx."""
+    if isinstance(data, dict):
+        data = json.dumps(data).encode()
+        headers = dict(headers or {}, **{"Content-Type": "application/json"})
+    req = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    try:
+        with _OPENER.open(req, timeout=10) as resp:
+            return resp.status, resp.headers, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def _admin(method, url, payload=None):
+    return _call(method, url, payload, {"X-Shard-Token": TOKEN})
+
+
+def _cookie(user, school):
+    serializer = app.session_interface.get_signing_serializer(app)
+    value = serializer.dumps({"user": user, "school": school})
+    return {"Cookie": f"{app.config['SESSION_COOKIE_NAME']}={value}"}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _seed(school, users, classrooms=None):
+    return {
+        "school": school,
+        "users": {u: {"password": "pw", "fullname": u.upper()} for u in users},
+        "classrooms": classrooms or {},
+    }
+
+
+@pytest.fixture(scope="module")
+def cluster(tmp_path_factory):
+    ports = {"a": _free_port(), "b": _free_port()}
+    urls = {name: f"http://127.0.0.1:{port}" for name, port in ports.items()}
+    env = dict(
+        os.environ,
+        UNIVERCYCLE_SHARDS=",".join(f"{name}={url}" for name, url in urls.items()),
+        UNIVERCYCLE_SHARD_PINS=str(tmp_path_factory.mktemp("shards") / "pins.json"),
+        UNIVERCYCLE_SHARD_TOKEN=TOKEN,
+    )
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "flask", "--app", "local_app", "run", "--port", str(port)],
+            cwd=HERE, env=dict(env, UNIVERCYCLE_SHARD=name),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        for name, port in ports.items()
+    ]
+    try:
+        for url in urls.values():
+            for _ in range(100):
+                try:
+                    urllib.request.urlopen(url + "/", timeout=1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            else:
+                raise RuntimeError(f"{url} did not start")
+        yield urls, env
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait()
+
+
+def test_register_on_wrong_shard_redirects(cluster):
+    urls, _ = cluster
+    status, headers, _ = _call("POST", urls["b"] + "/register", f"username=x&school={SCHOOL}".encode())
+    assert status == 307
+    assert headers["Location"] == urls["a"] + "/register"
+
+
+def test_import_conflict_is_rejected(cluster):
+    urls, _ = cluster
+    assert _admin("POST", urls["b"] + "/admin/tenants", _seed("other-school", ["taken"]))[0] == 201
+
+    clash = _seed("third-school", ["taken", "fresh"])
+    status, _, body = _admin("POST", urls["b"] + "/admin/tenants", clash)
+    assert status == 409
+    assert json.loads(body)["users"] == ["taken"]
+    # walang na-import na kahit ano
+    assert json.loads(_admin("GET", urls["b"] + "/admin/tenants/third-school")[2])["users"] == {}
+
+
+def test_reimport_does_not_double_weekly_totals(cluster):
+    urls, _ = cluster
+    payload = _seed(SCHOOL_B, ["again1", "again2"], {
+        "AGAIN1": {"name": "Again", "owner": "again1", "members": ["again1", "again2"]},
+    })
+    payload["users"]["again1"]["study"] = [{"date": A.today(), "minutes": 30}]
+    # parang inulit na move: parehong snapshot, dalawang beses
+    for _ in range(2):
+        assert _admin("POST", urls["b"] + "/admin/tenants", payload)[0] == 201
+
+    status, _, body = _call("GET", urls["b"] + "/api/v1/classroom/AGAIN1/leaderboard", None,
+                            _cookie("again1", SCHOOL_B))
+    assert status == 200
+    board = json.loads(body)
+    assert board["total_minutes"] == 30
+    assert [(row["username"], row["minutes"]) for row in board["top"]] == [("again1", 30)]
+
+
+def test_frozen_school_is_read_only(cluster):
+    urls, _ = cluster
+    assert _admin("POST", urls["a"] + "/admin/tenants", _seed(SCHOOL, ["frozen1"]))[0] == 201
+    cookie = _cookie("frozen1", SCHOOL)
+
+    assert _admin("POST", f"{urls['a']}/admin/tenants/{SCHOOL}/freeze")[0] == 200
+    assert _call("POST", urls["a"] + "/study", b"minutes=5", cookie)[0] == 503
+    assert _call("GET", urls["a"] + "/summary", None, cookie)[0] == 200
+
+    assert _admin("DELETE", f"{urls['a']}/admin/tenants/{SCHOOL}/freeze")[0] == 200
+    assert _call("POST", urls["a"] + "/study", b"minutes=5", cookie)[0] == 200
+
+
+def test_move_keeps_writes_made_during_the_move(cluster):
+    urls, env = cluster
+    user = "mover"
+    classroom = {"MOVE01": {"name": "Move", "owner": user, "members": [user]}}
+    assert _admin("POST", urls["a"] + "/admin/tenants", _seed(SCHOOL, [user], classroom))[0] == 201
+    cookie = _cookie(user, SCHOOL)
+
+    saved = []
+    stop = threading.Event()
+
+    def writer():
+        # parang browser: sundan ang 307, ulitin kapag 503
+        base = urls["a"]
+        while not stop.is_set():
+            status, headers, _ = _call("POST", base + "/study", b"minutes=1", cookie)
+            if status == 307:
+                base = headers["Location"].rsplit("/study", 1)[0]
+            elif status == 503:
+                time.sleep(0.01)
+            else:
+                assert status == 200
+                saved.append(base)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    time.sleep(0.3)
+    out = subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "app", "move-tenant", SCHOOL, "b"],
+        cwd=HERE, env=dict(env, UNIVERCYCLE_SHARD="a"), capture_output=True, text=True,
+    )
+    time.sleep(0.3)
+    stop.set()
+    thread.join()
+    assert out.returncode == 0, out.stderr
+
+    assert json.load(open(env["UNIVERCYCLE_SHARD_PINS"]))[SCHOOL] == "b"
+    assert saved.count(urls["a"]) and saved.count(urls["b"])
+
+    snapshot = json.loads(_admin("GET", f"{urls['b']}/admin/tenants/{SCHOOL}")[2])
+    moved = sum(r["minutes"] for r in snapshot["users"][user]["study"])
+    assert moved == len(saved)
+    assert snapshot["classrooms"]["MOVE01"]["members"] == [user]
+    assert json.loads(_admin("GET", f"{urls['a']}/admin/tenants/{SCHOOL}")[2])["users"] == {}
+
+    # source: naka-thaw na, at redirect na papunta sa b
+    status, headers, _ = _call("POST", urls["a"] + "/study", b"minutes=1", cookie)
+    assert status == 307 and headers["Location"].startswith(urls["b"])
+
+
+def test_native_asgi_routes_follow_tenant_routing(monkeypatch):
+    monkeypatch.setattr(A, "SHARDS", {"a": "http://shard-a", "b": "http://shard-b"})
+    monkeypatch.setattr(A, "THIS_SHARD", "b")
+    monkeypatch.setattr(A, "SHARD_RING", RING)
+    cookie = _cookie("someone", SCHOOL)["Cookie"].encode()
+    scope = {
+        "type": "http", "method": "GET", "path": "/api/v1/classroom/ABC123/presence",
+        "query_string": b"", "headers": [(b"cookie", cookie)],
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(A.asgi_app(scope, receive, send))
+    assert sent[0]["status"] == 307
+    assert dict(sent[0]["headers"])[b"location"] == b"http://shard-a/api/v1/classroom/ABC123/presence"